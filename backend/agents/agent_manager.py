@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from .base_agent import BaseAgent, AgentInput, AgentOutput, AgentState
 from .infra_designer_agent import InfraDesignerAgent
 from .aws_fetch_agent import AwsFetchAgent
@@ -44,6 +44,22 @@ class AgentManager:
         """
         Executes a predefined workflow of agents.
         """
+        final_state = initial_state
+        async for event in self.stream_workflow(workflow_name, initial_input, initial_state):
+            if event["event"] == "workflow_complete":
+                final_state = event["state"]
+        return final_state
+    
+    async def stream_workflow(
+        self,
+        workflow_name: str,
+        initial_input: AgentInput,
+        initial_state: AgentState
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Executes a predefined workflow of agents, yielding the intermediate events of agents
+        that support streaming. The last event is {"event": "workflow_complete", "state": AgentState}.
+        """
         if workflow_name not in self.workflows:
             raise ValueError(f"Workflow '{workflow_name}' not found.")
         
@@ -61,15 +77,25 @@ class AgentManager:
             
             # Update state before execution
             current_state.current_step = f"executing_{agent_name}"
+            yield {"event": "progress", "step": current_state.current_step, "agent": agent_name}
             
-            output = await agent.execute(current_input, current_state)
+            if hasattr(agent, "execute_stream"):
+                output = None
+                async for event in agent.execute_stream(current_input, current_state):
+                    if event["event"] == "result":
+                        output = event["output"]
+                    else:
+                        yield {**event, "agent": agent_name}
+            else:
+                output = await agent.execute(current_input, current_state)
             last_output = output  # Store the most recent output
 
             if output.status == "error":
                 print(f"Agent {agent.name} failed with error: {output.metadata.get('error')}")
                 current_state.status = "error"
                 current_state.error = output.metadata.get('error', 'Unknown agent error')
-                return current_state
+                yield {"event": "workflow_complete", "state": current_state}
+                return
             
             # Pass results to the next agent in the chain
             current_input.previous_results[agent_name] = output.result
@@ -80,7 +106,7 @@ class AgentManager:
             current_state.status = "complete"
             current_state.current_step = "workflow_complete"
         
-        return current_state
+        yield {"event": "workflow_complete", "state": current_state}
     
     async def execute_single_agent(
         self, 
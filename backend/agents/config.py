@@ -4,20 +4,68 @@ from typing import Optional
 class AgentConfig(BaseSettings):
     # Ollama Configuration
     ollama_base_url: str = "http://localhost:11434"
+    ollama_base_urls: list = []  # Several Ollama hosts to balance across; overrides ollama_base_url
+    ollama_health_check_interval: float = 15.0  # Seconds between health/model probes of each host
+    ollama_eject_after_failures: int = 2  # Consecutive failed calls before a host is taken out of rotation
     default_model: str = "llama3.2:3b"
     fallback_model: str = "qwen3:4b"
 
     # Agent Settings
     max_retries: int = 3
-    timeout_seconds: int = 300
+    timeout_seconds: int = 300  # Per-call generation timeout
     temperature: float = 0.3
     # max_tokens: int = 2000
 
     # Ollama generation parameters
     # num_ctx: int = 2048  # Reduced context window
+    # num_ctx is picked per request from these buckets; few distinct sizes keep Ollama
+    # from reloading the model for every small change in prompt length
+    num_ctx_buckets: list = [2048, 4096, 8192]
+    num_predict_reserve: int = 1024  # Tokens kept free in the context for the response
+    chars_per_token: float = 3.5  # Prompt size estimate for llama-style tokenizers on JSON-heavy text
+    reference_token_budget: int = 1200  # Prompt tokens allowed for retrieved reference architectures
+    min_filtered_references: int = 2  # Fewer filtered search results than this falls back to an unfiltered search
     top_p: float = 0.8  # More focused sampling
     repeat_penalty: float = 1.05  # Reduce repetition
 
+    # Ollama client pooling / concurrency
+    ollama_max_connections: int = 10  # Pooled HTTP connections shared by all calls
+    ollama_max_concurrency: int = 2  # Generations allowed in flight at once, per Ollama host
+    ollama_max_queue_depth: int = 50  # Generations allowed to wait before new ones are rejected
+    ollama_connect_timeout: float = 10.0
+    # Response format for structured calls: "schema" sends the JSON schema (Ollama >= 0.5),
+    # "json" uses plain JSON mode, anything else leaves generation unconstrained
+    ollama_structured_format: str = "schema"
+    ollama_keep_alive: str = "30m"  # How long Ollama keeps the model resident after a call
+    ollama_warmup_enabled: bool = True
+    ollama_warmup_num_ctx: int = 4096  # Should match the bucket most real calls land in
+
+    # Hedged structured generations: if the primary model has produced nothing after the
+    # hedge delay, the same prompt also runs on the fallback model (or another host)
+    hedge_enabled: bool = True
+    hedge_percentile: float = 0.95  # Hedge delay is this percentile of recent time-to-first-token
+    hedge_min_delay_seconds: float = 2.0
+    hedge_default_delay_seconds: float = 30.0  # Used until enough latency samples exist
+    latency_min_samples: int = 10
+
+    # Per-request model routing for architecture designs
+    routing_enabled: bool = True
+    routing_models: list = ["llama3.2:3b", "qwen3:4b"]  # Smallest/fastest first
+    routing_budget_safety: float = 0.8  # Share of the time budget a model's p95 may use
+    design_time_budget_seconds: float = 1200.0  # Total time an architecture design may take
+
+    # Structured response cache (in-process LRU backed by Redis)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 256
+    llm_cache_ttl_seconds: int = 86400
+
+    # Semantic cache for whole architecture designs
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.9  # Minimum cosine similarity between prompts
+    semantic_cache_numeric_tolerance: float = 0.2  # Allowed relative drift for users/budget/latency
+    semantic_cache_max_entries: int = 500
+    semantic_cache_ttl_seconds: int = 86400
+
     # Available Models (you can modify this list)
     available_models: list = [
         # "granite3.1-moe:3b",
@@ -34,4 +82,8 @@ class AgentConfig(BaseSettings):
         env_file = ".env"
         extra = "ignore"
 
+    def get_ollama_base_urls(self) -> list:
+        """Get the Ollama hosts to route generations to"""
+        return self.ollama_base_urls or [self.ollama_base_url]
+
 agent_config = AgentConfig()
\ No newline at end of file
@@ -1,9 +1,15 @@
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List, AsyncIterator
 import asyncio
+import time
 from .base_agent import BaseAgent, AgentInput, AgentOutput, AgentState
 from services.ollama_service import ollama_service
+from services.llm_scheduler import PRIORITY_INTERACTIVE
+from services.structured_output import ARCHITECTURE_DESIGN_SCHEMA
+from services.token_budget import token_budget
+from services.model_router import model_router
+from .config import agent_config
 from services.vector_db_service import vector_db_service
+from services.pattern_metadata import service_families
 
 class InfraDesignerAgent(BaseAgent):
     """Enhanced Agent responsible for designing AWS infrastructure"""
@@ -83,24 +89,47 @@ DESIGN RULES:
     
     async def execute(self, input_data: AgentInput, state: AgentState) -> AgentOutput:
         """Execute enhanced infrastructure design"""
+        output = None
+        async for event in self.execute_stream(input_data, state):
+            if event["event"] == "result":
+                output = event["output"]
+        return output
+    
+    async def execute_stream(self, input_data: AgentInput, state: AgentState) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute infrastructure design, yielding progress and token events as they happen.
+        The last event is always {"event": "result", "output": AgentOutput}.
+        """
+        started_at = time.perf_counter()
         try:
             # Validate input
             if not self.validate_input(input_data):
-                return self._create_error_output(
+                yield self._result_event(self._create_error_output(
                     input_data.session_id,
                     "Invalid input: Prompt must be at least 10 characters"
-                )
+                ))
+                return
             
             # Check Ollama availability
             if not ollama_service.is_available():
-                return self._create_error_output(
+                await ollama_service.connect()
+            if not ollama_service.is_available():
+                yield self._result_event(self._create_error_output(
                     input_data.session_id,
                     "Ollama service not available. Please start Ollama with: ollama serve"
-                )
+                ))
+                return
             
+            yield self._progress_event("searching_reference_architectures", 20)
             print("🔎 Searching for relevant architecture patterns...")
             try:
-                similar_patterns = vector_db_service.search_similar_patterns(input_data.prompt, limit=6)
+                filters = self._search_filters(input_data)
+                similar_patterns = await vector_db_service.search_similar_patterns(
+                    input_data.prompt, limit=6, filters=filters
+                )
+                # Narrow requests can filter out every good reference; widen to the whole store
+                if filters and len(similar_patterns) < agent_config.min_filtered_references:
+                    similar_patterns = await vector_db_service.search_similar_patterns(input_data.prompt, limit=6)
                 if similar_patterns:
                     print(f"✅ Found {len(similar_patterns)} relevant patterns.")
                 else:
@@ -109,50 +138,51 @@ DESIGN RULES:
                 print(f"⚠️ Vector DB search failed: {e}. Proceeding without examples.")
                 similar_patterns = []
             
-            examples_prompt_section = ""
-            if similar_patterns:
-                examples_json = json.dumps([p['architecture'] for p in similar_patterns], indent=2)
-                examples_prompt_section = f"""
-                ---
-                REFERENCE ARCHITECTURES:
-                Here are some reference architectures that are similar to the user's request.
-                Use these as inspiration for your design.
-
-                {examples_json}
-                ---
-                """
-
-            user_prompt = f"""{examples_prompt_section}
-            
-            Design AWS infrastructure for:
+            user_prompt = self._build_user_prompt(input_data, similar_patterns)
             
-            Prompt: {input_data.prompt}
-            Users: {input_data.context.get('expected_total_users', 1000)}
-            Concurrent: {input_data.context.get('concurrent_users', 100)}
-            Region: {input_data.context.get('region', 'ap-south-1')}
-            Budget: ${input_data.context.get('max_cost', 'flexible')}/month
+            # Pick the model from the request's complexity and the time it has left
+            time_budget = agent_config.design_time_budget_seconds - (time.perf_counter() - started_at)
+            routing = model_router.route(
+                input_data.prompt,
+                input_data.context,
+                time_budget,
+                ollama_service.available_models,
+                ollama_service.default_model
+            )
             
-            Design optimized AWS architecture in JSON format."""
+            yield self._progress_event("generating_architecture", 40)
             
             # SINGLE ATTEMPT WITH TIMEOUT
+            response_chunks = []
+            fallback_used = False
             try:
                 # Set a timeout for the generation
-                architecture_design = await asyncio.wait_for(
-                    ollama_service.generate_structured_response(
+                async with asyncio.timeout(time_budget):
+                    async for token in ollama_service.stream_structured_response(
                         system_prompt=self.system_prompt,
                         user_prompt=user_prompt,
-                        context=input_data.context
-                    ),
-                    timeout=1200  # 60 second timeout
-                )
+                        context=input_data.context,
+                        model=routing["model"],
+                        priority=PRIORITY_INTERACTIVE,
+                        session_id=input_data.session_id,
+                        schema=ARCHITECTURE_DESIGN_SCHEMA
+                    ):
+                        response_chunks.append(token)
+                        yield {"event": "token", "content": token}
+                
+                architecture_design = ollama_service.parse_structured_response("".join(response_chunks))
                 
                 # Quick validation and fallback
                 if architecture_design.get("raw_response"):
                     architecture_design = self._create_quick_fallback(input_data.context)
+                    fallback_used = True
                 
-            except asyncio.TimeoutError:
+            except TimeoutError:
                 print("⏰ Ollama generation timeout, using fallback")
                 architecture_design = self._create_quick_fallback(input_data.context)
+                fallback_used = True
+            
+            model_router.record_outcome(routing, time.perf_counter() - started_at, not fallback_used)
             
             # Update state
             self.update_state(state, {
@@ -160,21 +190,88 @@ DESIGN RULES:
                 "architecture": architecture_design,
                 "status": "processing"
             })
+            yield self._progress_event("infrastructure_design_complete", 90)
             
-            return AgentOutput(
+            yield self._result_event(AgentOutput(
                 agent_name=self.name,
                 session_id=input_data.session_id,
                 result={
                     "architecture": architecture_design,
-                    "model_used": ollama_service.default_model,
+                    "model_used": routing["model"],
+                    "routing": routing,
+                    "fallback_used": fallback_used,
                     # "requirements_analysis": requirements
                 },
                 status="complete",
                 next_agent=None,
-            )
+            ))
             
         except Exception as e:
-            return self._create_error_output(input_data.session_id, f"Execution error: {str(e)}")
+            yield self._result_event(self._create_error_output(input_data.session_id, f"Execution error: {str(e)}"))
+    
+    def _search_filters(self, input_data: AgentInput) -> Dict[str, Any]:
+        """Reference search filters derived from the request's region and the services it mentions"""
+        filters: Dict[str, Any] = {}
+        region = input_data.context.get("region")
+        if region:
+            filters["region"] = region
+        text = " ".join([
+            input_data.prompt,
+            str(input_data.context.get("usage_pattern") or ""),
+            str(input_data.context.get("constraints") or "")
+        ])
+        families = service_families(text, min_mentions=1)
+        if families:
+            filters["service_families"] = families
+        return filters
+
+    def _build_user_prompt(self, input_data: AgentInput, similar_patterns: List[Dict[str, Any]]) -> str:
+        """Build the user prompt from the request and retrieved reference architectures"""
+        examples_prompt_section = ""
+        # Only the best passages of each reference page go into the prompt
+        references = [
+            {
+                "score": p.get("score", 0),
+                "source": p.get("source"),
+                "passages": p.get("passages") or [p.get("description")]
+            }
+            for p in similar_patterns
+        ]
+        # Keep the most relevant references that fit the prompt budget
+        references, _ = token_budget.fit_items(references, agent_config.reference_token_budget)
+        if references:
+            examples_json = token_budget.compact_json(
+                [{"source": r["source"], "passages": r["passages"]} for r in references]
+            )
+            examples_prompt_section = f"""
+            ---
+            REFERENCE ARCHITECTURES:
+            Here are some reference architectures that are similar to the user's request.
+            Use these as inspiration for your design.
+
+            {examples_json}
+            ---
+            """
+
+        return f"""{examples_prompt_section}
+        
+        Design AWS infrastructure for:
+        
+        Prompt: {input_data.prompt}
+        Users: {input_data.context.get('expected_total_users', 1000)}
+        Concurrent: {input_data.context.get('concurrent_users', 100)}
+        Region: {input_data.context.get('region', 'ap-south-1')}
+        Budget: ${input_data.context.get('max_cost', 'flexible')}/month
+        
+        Design optimized AWS architecture in JSON format."""
+    
+    def _progress_event(self, step: str, progress: int) -> Dict[str, Any]:
+        """Create a progress event for streaming callers"""
+        return {"event": "progress", "step": step, "progress": progress}
+    
+    def _result_event(self, output: AgentOutput) -> Dict[str, Any]:
+        """Create the final result event for streaming callers"""
+        return {"event": "result", "output": output}
         
     def _create_quick_fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Quick fallback design - minimal but complete"""
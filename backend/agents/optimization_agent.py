@@ -1,6 +1,8 @@
 from .base_agent import BaseAgent, AgentInput, AgentOutput, AgentState
 from services.ollama_service import ollama_service
-import json
+from services.llm_scheduler import PRIORITY_BULK
+from services.structured_output import OPTIMIZATION_SUGGESTIONS_SCHEMA
+from services.token_budget import token_budget
 
 class OptimizationAgent(BaseAgent):
     """
@@ -84,13 +86,16 @@ the response should follow the given structure:
         }
         
         user_prompt = f"""User Request: "{input_data.prompt}"
-        Analyze the following AWS resource summary based on the user's request and provide optimization suggestions.Resource Summary: {json.dumps(resource_summary, indent=2)}"""
+        Analyze the following AWS resource summary based on the user's request and provide optimization suggestions.Resource Summary: {token_budget.compact_json(resource_summary)}"""
 
         # 3. Call the LLM to get optimization suggestions
         try:
             optimization_suggestions = await ollama_service.generate_structured_response(
                 system_prompt=self.system_prompt,
-                user_prompt=user_prompt
+                user_prompt=user_prompt,
+                priority=PRIORITY_BULK,
+                session_id=input_data.session_id,
+                schema=OPTIMIZATION_SUGGESTIONS_SCHEMA
             )
         except Exception as e:
             return self._create_error_output(input_data.session_id, f"LLM generation failed: {e}")
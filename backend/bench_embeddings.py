@@ -0,0 +1,100 @@
+"""
+Compare embedding backends on latency, memory and retrieval quality.
+
+    python bench_embeddings.py --backends sentence_transformers onnx onnx_int8
+
+For every backend: model load time and resident memory it added, single-query latency
+(p50/p95), batch throughput, and recall@k of its nearest neighbours against the
+full-precision sentence_transformers backend. Documents are the passages already in the
+vector DB (falling back to synthetic text); queries are the first sentence of a sample of
+them. Qdrant scalar quantization is not measured here: the local-mode client always
+searches full-precision vectors.
+"""
+import argparse
+import gc
+import random
+import time
+import numpy as np
+from services.embedding_backends import load_embedding_backend
+from services.vector_db_service import Model_Path, vector_db_service
+
+def rss_mb() -> float:
+    """Resident memory of this process"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / 2 ** 20
+
+def load_corpus(size: int) -> list:
+    """Passages from the vector DB, or synthetic ones if it is empty"""
+    try:
+        points, _ = vector_db_service.client.scroll(
+            collection_name=vector_db_service.collection_name,
+            limit=size,
+            with_payload=["description"]
+        )
+        corpus = [p.payload["description"] for p in points if p.payload.get("description")]
+    except Exception as e:
+        print(f"⚠️  Could not read the vector DB ({e}), using synthetic passages")
+        corpus = []
+    if len(corpus) < 50:
+        rng = random.Random(7)
+        words = ("aws lambda api gateway dynamodb s3 cloudfront vpc load balancer autoscaling rds aurora "
+                 "elasticache sqs sns kinesis eks ecs fargate iam kms waf route53 backup latency").split()
+        corpus = [" ".join(rng.choice(words) for _ in range(120)) + "." for _ in range(size)]
+    return corpus
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", nargs="+", default=["sentence_transformers", "onnx", "onnx_int8"])
+    parser.add_argument("--corpus", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    queries = [text.split(".")[0][:200] for text in random.Random(11).sample(corpus, min(args.queries, len(corpus)))]
+    reference_neighbours = None
+
+    for name in args.backends:
+        gc.collect()
+        rss_before = rss_mb()
+        started_at = time.perf_counter()
+        try:
+            model = load_embedding_backend(name, Model_Path)
+        except Exception as e:
+            print(f"{name:>22}: unavailable ({e})")
+            continue
+        load_seconds = time.perf_counter() - started_at
+        model.encode(["warm up"], normalize_embeddings=True)
+
+        latencies = []
+        for query in queries:
+            started_at = time.perf_counter()
+            model.encode([query], normalize_embeddings=True)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+        started_at = time.perf_counter()
+        doc_vectors = np.asarray(model.encode(corpus, batch_size=32, normalize_embeddings=True), dtype=np.float32)
+        throughput = len(corpus) / (time.perf_counter() - started_at)
+        query_vectors = np.asarray(model.encode(queries, normalize_embeddings=True), dtype=np.float32)
+        neighbours = np.argsort(-(query_vectors @ doc_vectors.T), axis=1)[:, :args.k]
+        if reference_neighbours is None:
+            reference_neighbours = neighbours
+        recall = np.mean([
+            len(set(a) & set(b)) / args.k for a, b in zip(neighbours, reference_neighbours)
+        ])
+
+        print(
+            f"{name:>22}: load {load_seconds:5.1f}s, +{rss_mb() - rss_before:6.0f} MB RSS, "
+            f"query p50 {percentile(latencies, 0.5):6.1f} ms / p95 {percentile(latencies, 0.95):6.1f} ms, "
+            f"{throughput:7.1f} passages/s, recall@{args.k} {recall:.3f}"
+        )
+        del model
+    if args.backends[0] != "sentence_transformers":
+        print(f"Note: recall@{args.k} is relative to {args.backends[0]}, the first backend listed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark embedding + upsert throughput of the vector DB ingestion path.
+
+    python bench_ingestion.py --pages 200 --batch-pages 16
+
+Compares the old unbatched path (encode one text, single-point upsert with wait=True)
+with add_patterns() batches, on synthetic page-sized documents, using an in-memory
+collection so the on-disk index is untouched. Both sides store the same chunked
+passages, so the two runs do the same amount of embedding work.
+"""
+import argparse
+import random
+import time
+import uuid
+from qdrant_client import models
+from services.vector_db_service import VectorDBService
+
+WORDS = (
+    "aws lambda api gateway dynamodb s3 cloudfront vpc subnet load balancer autoscaling "
+    "rds aurora elasticache sqs sns kinesis eks ecs fargate iam kms waf route53 backup "
+    "multi-az region availability latency throughput serverless microservices pipeline"
+).split()
+
+def synthetic_pages(count: int, words_per_page: int) -> list:
+    rng = random.Random(42)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_page)) for _ in range(count)]
+
+def per_passage(service: VectorDBService, pages: list) -> float:
+    """The pre-batching ingestion path, applied to the same passages add_patterns() stores"""
+    started_at = time.perf_counter()
+    for i, page in enumerate(pages):
+        for passage in service.chunk_text(page):
+            vector = service.embedding_model.encode(passage).tolist()
+            service.client.upsert(
+                collection_name=service.live_collection,
+                points=[models.PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"description": passage, "architecture": {"source": f"page-{i}"}})],
+                wait=True
+            )
+    return time.perf_counter() - started_at
+
+def batched(service: VectorDBService, pages: list, batch_pages: int) -> float:
+    started_at = time.perf_counter()
+    for start in range(0, len(pages), batch_pages):
+        chunk = pages[start:start + batch_pages]
+        service.add_patterns([(page, {"source": f"page-{start + i}"}) for i, page in enumerate(chunk)])
+    return time.perf_counter() - started_at
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector DB ingestion")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--batch-pages", type=int, default=16)
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.pages, args.words_per_page)
+    for name, run in (
+        ("unbatched", lambda s: per_passage(s, pages)),
+        (f"batched ({args.batch_pages} pages)", lambda s: batched(s, pages, args.batch_pages)),
+    ):
+        service = VectorDBService(collection_name=f"bench_{uuid.uuid4().hex[:8]}", path="")
+        service.embedding_model.encode("warm up")
+        seconds = run(service)
+        points = service.count()
+        print(f"{name:>24}: {args.pages / seconds:8.1f} pages/sec, {points / seconds:8.1f} passages/sec ({seconds:.2f}s, {points} points)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Build the reference-architecture index offline into a versioned artifact.
+
+    python build_index.py ./index_artifacts
+    python build_index.py ./index_artifacts --start-url https://aws.amazon.com/architecture/ --max-pages 200
+
+Runs the full DataIngestionService crawl and embedding into an in-memory store, then writes
+<output_dir>/<collection version>/ (manifest.json, vectors.npy, payloads.jsonl, the snapshot
+format) and points <output_dir>/CURRENT at it. API replicas started with
+VECTOR_DB_ARTIFACT_PATH=<output_dir> load the current artifact read-only instead of each
+crawling on their own. Older artifacts are left in place; rewrite CURRENT to roll back.
+"""
+import argparse
+import asyncio
+import json
+import os
+from services.data_ingestion_service import data_ingestion_service, DEFAULT_START_URL
+from services.vector_db_service import vector_db_service, ARTIFACT_POINTER
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a prebuilt vector index artifact")
+    parser.add_argument("output_dir")
+    parser.add_argument("--start-url", default=DEFAULT_START_URL)
+    parser.add_argument("--max-pages", type=int, default=None)
+    args = parser.parse_args()
+
+    # Build in memory: a running API's on-disk store is neither touched nor locked,
+    # and an artifact configured for serving is not the one being built
+    vector_db_service.path = ""
+    vector_db_service.artifact_path = ""
+    if args.max_pages:
+        data_ingestion_service.max_pages = args.max_pages
+    asyncio.run(data_ingestion_service.ingest_website(args.start_url))
+
+    version = vector_db_service.live_collection
+    manifest = vector_db_service.export_snapshot(os.path.join(args.output_dir, version))
+    # Switch CURRENT only once the artifact is complete, so readers never see a partial one
+    pointer = os.path.join(args.output_dir, ARTIFACT_POINTER)
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(pointer + ".tmp", pointer)
+    print(json.dumps({**manifest, "artifact": version}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from pydantic_settings import BaseSettings
+
+class VectorDBConfig(BaseSettings):
+    """
+    Vector database settings.
+    The reference-architecture index is kept on disk so restarts reuse it instead of
+    re-crawling and re-embedding the AWS Architecture Center.
+    """
+    # Directory of the local Qdrant store; empty keeps the index in memory only
+    vector_db_path: str = "./vector_db_data"
+
+    # Bump to force a fresh crawl when the scraping/chunking logic changes
+    ingestion_version: str = "3"
+
+    # Snapshot directory imported at startup when the store has no complete ingestion,
+    # e.g. a prebuilt index baked into the container image
+    vector_db_snapshot_path: str = ""
+
+    # Prebuilt index artifact (see build_index.py) to serve read-only instead of a local
+    # store: an artifact directory, or a directory of them whose CURRENT file names the one
+    # to load. Replicas sharing it skip the crawl and never write to it.
+    vector_db_artifact_path: str = ""
+
+    # Rebuilds fill a new collection version and then switch the alias over to it
+    keep_previous_versions: int = 1  # Old versions kept for rollback; older ones are deleted
+
+    # Bulk ingestion
+    embedding_batch_size: int = 32  # Texts encoded per SentenceTransformer forward pass
+    embedding_batch_window_ms: float = 5.0  # How long the embedding worker waits to merge requests
+    embedding_max_batch_texts: int = 256  # Texts merged into one encode call at most
+    upsert_batch_size: int = 128  # Points per upsert request
+    upsert_wait: bool = False  # Pipeline upserts instead of waiting for each to be indexed
+    ingestion_batch_pages: int = 16  # Scraped pages buffered before they are embedded together
+    near_duplicate_max_distance: int = 3  # SimHash bits two pages may differ by and still be duplicates
+
+    # Crawling
+    crawl_workers: int = 8  # Pages fetched concurrently
+    crawl_max_depth: int = 4  # Link hops followed from the start URL
+    crawl_host_concurrency: int = 4  # Requests in flight per host
+    crawl_host_requests_per_second: float = 5.0  # Request rate per host; 0 for no limit
+    crawl_max_retries: int = 3  # Retries of timeouts, 429s and 5xx responses
+    crawl_retry_backoff_seconds: float = 0.5  # First retry delay, doubled on each attempt
+    parse_processes: int = 2  # Worker processes parsing HTML; 0 parses on the event loop
+
+    # Passage chunking; all-MiniLM-L6-v2 only sees the first 256 word pieces of an input
+    chunk_tokens: int = 200
+    chunk_overlap_tokens: int = 40
+    passages_per_document: int = 2  # Best passages returned for each matching page
+
+    # Embedding backend: "sentence_transformers" (PyTorch), "onnx" or "onnx_int8" (ONNX Runtime, CPU)
+    embedding_backend: str = "sentence_transformers"
+    embedding_threads: int = 0  # ONNX Runtime intra-op threads; 0 lets it decide
+
+    # Qdrant scalar quantization of stored vectors ("int8" or empty for none). Only a Qdrant
+    # server uses it; the local-mode client accepts the setting but searches full precision
+    qdrant_quantization: str = ""
+
+    # Search caches
+    query_embedding_cache_size: int = 1024
+    search_cache_size: int = 256
+    search_cache_ttl_seconds: float = 60.0
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+vector_db_config = VectorDBConfig()
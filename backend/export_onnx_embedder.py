@@ -0,0 +1,50 @@
+"""
+Export the local sentence-transformers model to ONNX for the "onnx" and "onnx_int8"
+embedding backends.
+
+    python export_onnx_embedder.py ./EM_Model/all-MiniLM-L6-v2
+
+Writes onnx/model.onnx (fp32) and onnx/model_int8.onnx (dynamic int8 weights) inside the
+model directory. Needs torch, transformers and onnxruntime, at export time only.
+"""
+import argparse
+import os
+import torch
+from transformers import AutoModel, AutoTokenizer
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from services.embedding_backends import ONNX_MODEL_FILES
+
+def export(model_path: str):
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).eval()
+    fp32_path = os.path.join(model_path, ONNX_MODEL_FILES["onnx"])
+    int8_path = os.path.join(model_path, ONNX_MODEL_FILES["onnx_int8"])
+    os.makedirs(os.path.dirname(fp32_path), exist_ok=True)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    print(f"✅ Exported {fp32_path}")
+
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized {int8_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("model_path", nargs="?", default="./EM_Model/all-MiniLM-L6-v2")
+    args = parser.parse_args()
+    export(args.model_path)
+
+if __name__ == "__main__":
+    main()
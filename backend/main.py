@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -6,11 +6,19 @@ from dotenv import load_dotenv
 import os
 import logging
 import asyncio
+import time
 from contextlib import asynccontextmanager
 
 from routers import github, architecture
 from redis_db.connection import redis_manager
-from services.data_ingestion_service import data_ingestion_service
+from services.data_ingestion_service import data_ingestion_service, DEFAULT_START_URL
+from services.ollama_service import ollama_service
+from services.web_scraper_service import web_scraper_service
+from services.semantic_cache import semantic_design_cache
+from services.model_router import model_router
+from services.vector_db_service import vector_db_service
+from config.vector_db_config import vector_db_config
+from agents.agent_manager import agent_manager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,24 +27,87 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Startup state of each backend component, reported by /ready
+startup_status = {}
+
+async def _start_component(name: str, start) -> bool:
+    """Run one component's startup and record how long it took"""
+    startup_status[name] = {"status": "starting", "seconds": None}
+    started_at = time.perf_counter()
+    try:
+        await start()
+        ok = True
+    except Exception as e:
+        logger.error(f"❌ {name} failed to start: {e}")
+        startup_status[name]["error"] = str(e)
+        ok = False
+    seconds = round(time.perf_counter() - started_at, 2)
+    startup_status[name].update({"status": "ready" if ok else "failed", "seconds": seconds})
+    logger.info(f"⏱️  {name} startup took {seconds}s")
+    return ok
+
+async def _start_ollama():
+    """Connect to Ollama, then load the model and prime the system-prompt prefix"""
+    async def connect():
+        await ollama_service.connect()
+        if not ollama_service.is_available():
+            raise RuntimeError("no Ollama host is reachable")
+    if await _start_component("ollama", connect):
+        system_prompts = [
+            agent.system_prompt for agent in agent_manager.agents.values()
+            if getattr(agent, "system_prompt", None)
+        ]
+        await _start_component("ollama_warmup", lambda: ollama_service.warm_up(system_prompts))
+
+async def _start_vector_db():
+    """Load the embedding model, then ingest reference architectures"""
+    if not await _start_component("vector_db", vector_db_service.initialize):
+        return
+    if vector_db_service.read_only:
+        # A prebuilt artifact is the whole index; replicas never crawl on their own
+        return
+    snapshot_path = vector_db_config.vector_db_snapshot_path
+    if snapshot_path and not vector_db_service.is_ingested():
+        await _start_component(
+            "vector_db_snapshot",
+            lambda: asyncio.to_thread(vector_db_service.import_snapshot, snapshot_path)
+        )
+    if vector_db_service.is_ingested():
+        print(f"INFO:     ♻️  Reusing ingested index ({vector_db_service.count()} points), skipping crawl")
+        return
+    print("INFO:     🚀 Triggering background data ingestion from AWS Architecture Center...")
+    # Started like an API-triggered rebuild, so a POST /vector-db/rebuild during the
+    # startup crawl reports this run instead of starting a second one
+    data_ingestion_service.start_rebuild(DEFAULT_START_URL)
+    await data_ingestion_service.wait_for_rebuild()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # On startup
     logger.info("Starting ArchiMind Backend...")
-    await redis_manager.connect()
+    await _start_component("redis", redis_manager.connect)
     if redis_manager.is_connected():
         logger.info("✅ Redis connection established")
     else:
         logger.warning("⚠️ Redis connection failed - some features may not work")
     
-    print("INFO:     🚀 Triggering background data ingestion from AWS Architecture Center...")
-    asyncio.create_task(data_ingestion_service.ingest_website("https://aws.amazon.com/architecture/"))
+    # Slow components warm up in the background so the server accepts requests right away;
+    # /ready reports when they are done
+    background_startup = [
+        asyncio.create_task(_start_ollama()),
+        asyncio.create_task(_start_vector_db())
+    ]
     
     yield
     
+    for task in background_startup:
+        task.cancel()
+    
     logger.info("Shutting down ArchiMind Backend...")
     await redis_manager.disconnect()
     logger.info("👋 Redis connection closed")
+    await ollama_service.close()
+    web_scraper_service.close()
 
 app = FastAPI(
     title="ArchiMind Backend",
@@ -91,6 +162,25 @@ async def health_check():
         "redis_connected": redis_status
     }
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Ready once the components needed to generate designs have started"""
+    # Ollama hosts can come and go after startup, so its readiness is checked live
+    ready = vector_db_service.is_ready() and ollama_service.is_available()
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "components": startup_status}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "ollama": ollama_service.get_metrics(),
+        "semantic_cache": semantic_design_cache.get_stats(),
+        "model_router": model_router.get_stats(),
+        "embedding": vector_db_service.embedder.get_stats(),
+        "search_cache": vector_db_service.search_cache.get_stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
\ No newline at end of file
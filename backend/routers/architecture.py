@@ -1,5 +1,10 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, Optional
 import uuid
+import asyncio
+import json
+import time
 import traceback
 import os
 from dotenv import load_dotenv
@@ -9,6 +14,8 @@ from agents.agent_manager import agent_manager
 from agents.base_agent import AgentInput, AgentState
 from redis_db.connection import redis_manager
 from services.vector_db_service import vector_db_service
+from services.data_ingestion_service import data_ingestion_service, DEFAULT_START_URL
+from services.semantic_cache import semantic_design_cache
 
 router = APIRouter()
 load_dotenv()
@@ -20,6 +27,83 @@ async def startup_redis():
     if not redis_manager.is_connected():
         await redis_manager.connect()
 
+def _build_architecture_input(request: ArchitectureRequest, session_id: str) -> AgentInput:
+    """Build the agent input for an architecture generation request"""
+    return AgentInput(
+        prompt=request.prompt,
+        context={
+            "region": request.region,
+            "max_cost": request.max_cost,
+            "expected_total_users": request.expected_total_users,
+            "concurrent_users": request.concurrent_users,
+            "latency_requirements": request.latency_requirements,
+            "usage_pattern": request.usage_pattern,
+            "constraints": request.constraints or {}
+        },
+        session_id=session_id,
+        previous_results={}
+    )
+
+async def _finish_architecture_session(session_id: str, final_state: AgentState) -> Dict[str, Any]:
+    """Store the outcome of an architecture generation workflow in the session"""
+    if final_state.status == "complete":
+        architecture = final_state.context.get("architecture")
+        if not architecture and final_state.result:
+            architecture = final_state.result.get("architecture")
+        
+        await session_manager.update_session(session_id, {
+            "status": "complete",
+            "architecture": architecture,
+            "workflow_complete": True,
+            "current_step": "complete",
+            "progress": 100,
+            "final_state": final_state.dict() if hasattr(final_state, 'dict') else str(final_state)
+        })
+        print(f"✅ Architecture generation completed for session {session_id}")
+        return {"event": "complete", "session_id": session_id, "architecture": architecture}
+    else:
+        error_msg = final_state.error or "Unknown workflow error"
+        await session_manager.update_session(session_id, {
+            "status": "error",
+            "error": error_msg,
+            "current_step": "error",
+            "progress": 0
+        })
+        print(f"❌ Architecture generation failed for session {session_id}: {error_msg}")
+        return {"event": "error", "session_id": session_id, "error": error_msg}
+
+async def _complete_from_semantic_cache(request: ArchitectureRequest, session_id: str) -> Optional[Dict[str, Any]]:
+    """Finish the session with a cached design for an equivalent request, if there is one"""
+    try:
+        architecture = await semantic_design_cache.lookup(request)
+    except Exception as e:
+        print(f"⚠️ Semantic cache lookup failed: {e}")
+        return None
+    if not architecture:
+        return None
+    
+    await session_manager.update_session(session_id, {
+        "status": "complete",
+        "architecture": architecture,
+        "workflow_complete": True,
+        "current_step": "complete",
+        "progress": 100,
+        "semantic_cache_hit": True
+    })
+    print(f"✅ Architecture served from semantic cache for session {session_id}")
+    return {"event": "complete", "session_id": session_id, "architecture": architecture, "cached": True}
+
+async def _remember_design(request: ArchitectureRequest, final_state: AgentState, llm_seconds: float):
+    """Store a successfully generated (non-fallback) design in the semantic cache"""
+    if final_state.status != "complete" or not final_state.result:
+        return
+    if final_state.result.get("fallback_used"):
+        return
+    try:
+        await semantic_design_cache.store(request, final_state.result.get("architecture"), llm_seconds)
+    except Exception as e:
+        print(f"⚠️ Semantic cache store failed: {e}")
+
 async def process_architecture_generation(request: ArchitectureRequest, session_id: str):
     """Background task to process architecture generation with better error handling"""
     try:
@@ -28,22 +112,16 @@ async def process_architecture_generation(request: ArchitectureRequest, session_
         if not redis_manager.is_connected():
             await redis_manager.connect()
         
+        if await _complete_from_semantic_cache(request, session_id):
+            return
+        
         await session_manager.update_session(session_id, {
             "status": "processing",
             "current_step": "initializing_agents",
             "progress": 10
         })
         
-        agent_input = AgentInput(
-            prompt=request.prompt,
-            context={
-                "region": request.region,
-                "max_cost": request.max_cost,
-                "constraints": request.constraints or {}
-            },
-            session_id=session_id,
-            previous_results={}
-        )
+        agent_input = _build_architecture_input(request, session_id)
         
         initial_state = AgentState(
             session_id=session_id,
@@ -53,6 +131,7 @@ async def process_architecture_generation(request: ArchitectureRequest, session_
         
         print(f"🔄 Executing 'architecture_generation' workflow for session {session_id}")
         
+        started_at = time.perf_counter()
         final_state = await agent_manager.execute_workflow(
             "architecture_generation",
             agent_input,
@@ -61,29 +140,8 @@ async def process_architecture_generation(request: ArchitectureRequest, session_
         
         print(f"🔄 Workflow completed for session {session_id}, status: {final_state.status}")
         
-        if final_state.status == "complete":
-            architecture = final_state.context.get("architecture")
-            if not architecture and final_state.result:
-                architecture = final_state.result.get("architecture")
-            
-            await session_manager.update_session(session_id, {
-                "status": "complete",
-                "architecture": architecture,
-                "workflow_complete": True,
-                "current_step": "complete",
-                "progress": 100,
-                "final_state": final_state.dict() if hasattr(final_state, 'dict') else str(final_state)
-            })
-            print(f"✅ Architecture generation completed for session {session_id}")
-        else:
-            error_msg = final_state.error or "Unknown workflow error"
-            await session_manager.update_session(session_id, {
-                "status": "error",
-                "error": error_msg,
-                "current_step": "error",
-                "progress": 0
-            })
-            print(f"❌ Architecture generation failed for session {session_id}: {error_msg}")
+        await _finish_architecture_session(session_id, final_state)
+        await _remember_design(request, final_state, time.perf_counter() - started_at)
     
     except Exception as e:
         error_msg = f"Background task error: {str(e)}"
@@ -101,6 +159,93 @@ async def process_architecture_generation(request: ArchitectureRequest, session_
         except Exception as session_error:
             print(f"❌ Failed to update session with error: {session_error}")
 
+def _ndjson(event: Dict[str, Any]) -> str:
+    """Serialize a stream event as one NDJSON line"""
+    return json.dumps(event, default=str) + "\n"
+
+# Generations outlive the streams that started them; keep references so they are not collected
+_generation_tasks: set = set()
+
+async def stream_architecture_generation(request: ArchitectureRequest, session_id: str) -> AsyncIterator[str]:
+    """
+    Stream progress events and model tokens of an architecture generation as NDJSON.
+    The generation runs as a detached task that the stream only observes, so a client
+    disconnect doesn't cancel it and /status polling still gets the result.
+    """
+    yield _ndjson({"event": "session", "session_id": session_id})
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_run_streamed_generation(request, session_id, events))
+    _generation_tasks.add(task)
+    task.add_done_callback(_generation_tasks.discard)
+    while True:
+        event = await events.get()
+        if event is None:
+            return
+        yield _ndjson(event)
+
+async def _run_streamed_generation(request: ArchitectureRequest, session_id: str, events: asyncio.Queue):
+    """Run architecture generation, publishing its events to the queue and a final None"""
+    try:
+        print(f"🔄 Streaming architecture generation for session {session_id}")
+        cached_event = await _complete_from_semantic_cache(request, session_id)
+        if cached_event:
+            await events.put(cached_event)
+            return
+        
+        await session_manager.update_session(session_id, {
+            "status": "processing",
+            "current_step": "initializing_agents",
+            "progress": 10
+        })
+        await events.put({"event": "progress", "step": "initializing_agents", "progress": 10})
+        
+        agent_input = _build_architecture_input(request, session_id)
+        initial_state = AgentState(
+            session_id=session_id,
+            current_step="starting_workflow",
+            status="processing"
+        )
+        
+        started_at = time.perf_counter()
+        final_state = initial_state
+        async for event in agent_manager.stream_workflow("architecture_generation", agent_input, initial_state):
+            if event["event"] == "workflow_complete":
+                final_state = event["state"]
+                continue
+            if event["event"] == "progress":
+                # Keep the session in sync so /status works for streaming clients too
+                updates = {"current_step": event["step"]}
+                if "progress" in event:
+                    updates["progress"] = event["progress"]
+                await session_manager.update_session(session_id, updates)
+            await events.put(event)
+        
+        final_event = await _finish_architecture_session(session_id, final_state)
+        await _remember_design(request, final_state, time.perf_counter() - started_at)
+        await events.put(final_event)
+    
+    except Exception as e:
+        error_msg = f"Streaming task error: {str(e)}"
+        print(f"❌ Exception in streaming architecture generation: {error_msg}")
+        await session_manager.update_session(session_id, {
+            "status": "error",
+            "error": error_msg,
+            "current_step": "error",
+            "progress": 0
+        })
+        await events.put({"event": "error", "session_id": session_id, "error": error_msg})
+    except asyncio.CancelledError:
+        # Server shutdown: don't leave the session "processing" for pollers
+        await session_manager.update_session(session_id, {
+            "status": "error",
+            "error": "Generation was cancelled",
+            "current_step": "error",
+            "progress": 0
+        })
+        raise
+    finally:
+        await events.put(None)
+
 async def process_architecture_optimization(session_id: str):
     """Background task to process architecture optimization."""
     try:
@@ -168,6 +313,38 @@ async def generate_architecture(request: ArchitectureRequest, background_tasks:
         status=StatusEnum.pending
     )
 
+@router.post("/generate/stream")
+async def generate_architecture_stream(request: ArchitectureRequest):
+    """
+    Generate AWS architecture and stream the result as NDJSON.
+    Emits a "session" event first, then "progress" and "token" events while the model runs,
+    and finishes with a "complete" (or "error") event carrying the parsed architecture.
+    """
+    if not redis_manager.is_connected():
+        await startup_redis()
+    
+    session_id = str(uuid.uuid4())
+    
+    session_data = {
+        "type": "architecture_generation",
+        "request": request.dict(),
+        "status": "pending",
+        "workflow_complete": False,
+        "current_step": "initialized",
+        "progress": 0
+    }
+
+    success = await session_manager.store_session(session_id, session_data)
+    
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to store session. Redis may be unavailable.")
+    
+    return StreamingResponse(
+        stream_architecture_generation(request, session_id),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/optimize", response_model=ArchitectureResponse)
 async def optimize_architecture(request: OptimizationRequest, background_tasks: BackgroundTasks):
     """
@@ -224,8 +401,10 @@ async def get_process_status(session_id: str):
         elif status == "processing":
             users = requirements.get('expected_users')
             user_text = f"{users:,}" if isinstance(users, int) else "N/A"
+            queue_status = await session_manager.get_queue_status(session_id)
+            step = (queue_status or {}).get("queue_step") or session_data.get('current_step', '...')
             response.suggestions = [
-                f"Processing: {session_data.get('current_step', '...')}",
+                f"Processing: {step}",
                 f"Progress: {session_data.get('progress', 0)}%",
                 f"Analyzing requirements for {user_text} users"
             ]
@@ -259,6 +438,7 @@ async def debug_vector_db():
     Returns all points (documents) currently stored.
     """
     try:
+        await vector_db_service.initialize()
         points, _ = vector_db_service.client.scroll(
             collection_name=vector_db_service.collection_name,
             limit=limit,
@@ -281,6 +461,27 @@ async def debug_vector_db():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to query vector database: {str(e)}")
 
+@router.post("/vector-db/rebuild", status_code=202)
+async def rebuild_vector_db(start_url: str = DEFAULT_START_URL):
+    """
+    Re-crawl and re-embed the reference architectures into a new collection version.
+    Searches keep using the current index until the rebuild finishes and is swapped in.
+    """
+    if vector_db_service.read_only:
+        raise HTTPException(
+            status_code=409,
+            detail="This replica serves a read-only index artifact; rebuild it with build_index.py"
+        )
+    return data_ingestion_service.start_rebuild(start_url)
+
+@router.get("/vector-db/rebuild")
+async def rebuild_vector_db_status():
+    """Progress of the latest index rebuild"""
+    return {
+        **data_ingestion_service.rebuild_status,
+        "live_collection": vector_db_service.live_collection
+    }
+
 @router.get("/debug/{session_id}")
 async def debug_session(session_id: str):
     """Debug endpoint to see full session data"""
@@ -0,0 +1,100 @@
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
+import hashlib
+import re
+from config.vector_db_config import vector_db_config
+
+SIMHASH_BITS = 64
+# The 64-bit SimHash is split into bands; two hashes within max_distance bits of each
+# other are guaranteed to agree on at least one band while max_distance < BANDS
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+WORD = re.compile(r"\w+")
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+# (exact hash, SimHash) of a text
+Fingerprint = Tuple[str, int]
+
+class ContentFingerprinter:
+    """
+    Finds scraped pages whose content was already ingested.
+    Exact duplicates are matched on a hash of the normalized text, near duplicates
+    (shared boilerplate with small differences) on the Hamming distance between
+    SimHashes of word 3-shingles.
+    Fingerprinting is the expensive part and touches no state, so callers compute
+    fingerprint() off the event loop and pass the result to find_duplicate()/remember().
+    """
+    def __init__(self, max_distance: int = vector_db_config.near_duplicate_max_distance):
+        if max_distance >= BANDS:
+            raise ValueError(
+                f"near_duplicate_max_distance must be below {BANDS}: banded lookup cannot find "
+                f"SimHashes further apart, got {max_distance}"
+            )
+        self.max_distance = max_distance
+        self._exact: Dict[str, str] = {}
+        self._bands: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(BANDS)]
+        self.stats = {
+            "unique": 0,
+            "exact_duplicates": 0,
+            "near_duplicates": 0
+        }
+
+    def _normalize(self, text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def exact_hash(self, text: str) -> str:
+        """Hash of the text, ignoring case and whitespace"""
+        return hashlib.sha256(self._normalize(text).encode("utf-8")).hexdigest()
+
+    def simhash(self, text: str) -> int:
+        """64-bit SimHash of the text's word 3-shingles"""
+        words = WORD.findall(text.lower())
+        shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+        values = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+                for shingle in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # Per bit: shingles with the bit set vote +1, the others -1
+        set_counts = ((values[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+        majority = 2 * set_counts > len(shingles)
+        return sum(1 << int(bit) for bit in np.flatnonzero(majority))
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        """Exact hash and SimHash of a text"""
+        return self.exact_hash(text), self.simhash(text)
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << BAND_BITS) - 1
+        return [fingerprint >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+    def find_duplicate(self, fingerprint: Fingerprint) -> Optional[Tuple[str, str]]:
+        """
+        The (parent id, "exact" | "near") of an already ingested copy of the fingerprinted
+        text, or None. Call remember() for texts that turn out to be new.
+        """
+        exact, simhash = fingerprint
+        parent_id = self._exact.get(exact)
+        if parent_id:
+            self.stats["exact_duplicates"] += 1
+            return parent_id, "exact"
+        for band, key in enumerate(self._band_keys(simhash)):
+            for candidate, candidate_parent in self._bands[band].get(key, ()):
+                if bin(candidate ^ simhash).count("1") <= self.max_distance:
+                    self.stats["near_duplicates"] += 1
+                    return candidate_parent, "near"
+        return None
+
+    def remember(self, fingerprint: Fingerprint, parent_id: str):
+        """Record the fingerprint of a newly ingested page"""
+        exact, simhash = fingerprint
+        self.stats["unique"] += 1
+        self._exact[exact] = parent_id
+        for band, key in enumerate(self._band_keys(simhash)):
+            self._bands[band].setdefault(key, []).append((simhash, parent_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
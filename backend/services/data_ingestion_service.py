@@ -1,51 +1,237 @@
 from services.web_scraper_service import web_scraper_service
 from services.vector_db_service import vector_db_service
-from typing import Set
+from services.content_fingerprint import ContentFingerprinter
+from config.vector_db_config import vector_db_config
+from typing import Set, List, Tuple, Dict, Any, Optional
+from datetime import datetime, timezone
+import asyncio
+import time
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 max_pages = int(os.getenv("MAX_PAGES"))
+DEFAULT_START_URL = "https://aws.amazon.com/architecture/"
+
+class IngestionStorageError(Exception):
+    """Writing to the vector DB failed; unlike a bad page, this aborts the crawl"""
 
 class DataIngestionService:
     """
     Orchestrates the process of scraping websites and ingesting content into the Vector DB.
     """
-    def __init__(self, max_pages: int = max_pages):
+    def __init__(
+        self,
+        max_pages: int = max_pages,
+        workers: int = vector_db_config.crawl_workers,
+        max_depth: int = vector_db_config.crawl_max_depth
+    ):
         self.max_pages = max_pages
+        self.workers = workers
+        self.max_depth = max_depth
         self.visited_urls: Set[str] = set()
+        # Every URL ever queued, so the frontier never holds duplicates
+        self.seen_urls: Set[str] = set()
+        self.fingerprints = ContentFingerprinter()
+        # Every URL serving each ingested page's content, by parent id
+        self.sources: Dict[str, List[str]] = {}
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        # Parent ids whose points are not written yet (pending or being flushed)
+        self._unstored: Set[str] = set()
+        self._write_lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Crawl state above belongs to one run at a time
+        self._running = False
+        self.rebuild_status: Dict[str, Any] = {"state": "idle"}
+
+    def start_rebuild(self, start_url: str) -> Dict[str, Any]:
+        """Start a background re-ingestion into a new collection version, unless one is running"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self.ingest_website(start_url))
+            # Reflect the new run straight away, before the task gets scheduled
+            self.rebuild_status = {"state": "starting", "start_url": start_url}
+        return self.rebuild_status
+
+    async def wait_for_rebuild(self):
+        """Wait for the running rebuild, if any, to finish"""
+        if self._rebuild_task is not None:
+            await self._rebuild_task
 
     async def ingest_website(self, start_url: str):
         """
         Crawls a website starting from a URL and ingests its content.
+        The content goes into a new collection version that replaces the live one only
+        once the crawl has finished, so searches never see a half-built index.
+        Raises RuntimeError if another ingestion is already running.
         """
+        if self._running:
+            raise RuntimeError("A data ingestion is already running")
+        self._running = True
+        try:
+            await self._ingest(start_url)
+        finally:
+            self._running = False
+
+    async def _ingest(self, start_url: str):
         print(f"🚀 Starting data ingestion from: {start_url}")
-        urls_to_visit = [start_url]
-        
-        while urls_to_visit and len(self.visited_urls) < self.max_pages:
-            url = urls_to_visit.pop(0)
-            if url in self.visited_urls:
-                continue
-
-            print(f"  -> Scraping: {url} ({len(self.visited_urls) + 1}/{self.max_pages})")
-            self.visited_urls.add(url)
-
-            html = await web_scraper_service.fetch_page(url)
-            if not html:
-                continue
-
-            content, new_links = web_scraper_service.parse_content(html, url)
-            
-            if content:
+        await vector_db_service.initialize()
+        self.visited_urls = set()
+        self.seen_urls = set()
+        self.fingerprints = ContentFingerprinter()
+        self.sources = {}
+        self._pending = []
+        self._unstored = set()
+        target = await asyncio.to_thread(vector_db_service.begin_rebuild)
+        self.rebuild_status = {
+            "state": "running",
+            "start_url": start_url,
+            "collection": target,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "pages_visited": 0,
+            "max_pages": self.max_pages,
+            "workers": self.workers,
+            "page_errors": 0
+        }
+        try:
+            await self._crawl(start_url, target)
+            await asyncio.to_thread(
+                vector_db_service.publish_ingestion, target, start_url, len(self.visited_urls)
+            )
+        except BaseException as e:
+            await asyncio.to_thread(vector_db_service.abort_rebuild, target)
+            self.rebuild_status.update({
+                "state": "failed",
+                "error": str(e) or type(e).__name__,
+                "finished_at": datetime.now(timezone.utc).isoformat()
+            })
+            print(f"❌ Data ingestion failed: {e}")
+            raise
+        self.rebuild_status.update({
+            "state": "complete",
+            "points": vector_db_service.count(target),
+            "content": self.fingerprints.get_stats(),
+            "fetch": web_scraper_service.get_stats(),
+            "finished_at": datetime.now(timezone.utc).isoformat()
+        })
+        print(f"✅ Data ingestion complete. Visited {len(self.visited_urls)} pages. Content: {self.fingerprints.get_stats()}")
+
+    async def _crawl(self, start_url: str, target: str):
+        """
+        Crawl from start_url with concurrent workers and store every new page in the
+        target collection. Pages are embedded and upserted in batches rather than one by one.
+        """
+        # asyncio.Queue is a deque underneath; seen_urls keeps each URL in it at most once
+        frontier: asyncio.Queue = asyncio.Queue()
+        self.seen_urls.add(start_url)
+        frontier.put_nowait((start_url, 0))
+        started_at = time.perf_counter()
+
+        workers = [asyncio.create_task(self._crawl_worker(frontier, target)) for _ in range(self.workers)]
+        drained = asyncio.create_task(frontier.join())
+        try:
+            # Workers only stop by failing; a storage error aborts the whole crawl
+            done, _ = await asyncio.wait([drained, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not drained:
+                    task.result()
+        finally:
+            for task in [drained, *workers]:
+                task.cancel()
+            await asyncio.gather(drained, *workers, return_exceptions=True)
+
+        batch, self._pending = self._pending, []
+        await self._flush(batch, target, wait=True)
+        elapsed = time.perf_counter() - started_at
+        print(f"🕸️  Crawled {len(self.visited_urls)} pages in {elapsed:.1f}s with {self.workers} workers")
+
+    async def _crawl_worker(self, frontier: asyncio.Queue, target: str):
+        """Take URLs off the frontier until the crawl is cancelled"""
+        while True:
+            url, depth = await frontier.get()
+            try:
+                if len(self.visited_urls) < self.max_pages:
+                    await self._crawl_page(url, depth, frontier, target)
+            except IngestionStorageError:
+                raise
+            except Exception as e:
+                # One bad page (malformed URL or HTML, a crashed parser) must not cost the whole crawl
+                self.rebuild_status["page_errors"] += 1
+                print(f"⚠️  Skipping {url}: {type(e).__name__}: {e}")
+            finally:
+                frontier.task_done()
+
+    async def _crawl_page(self, url: str, depth: int, frontier: asyncio.Queue, target: str):
+        """Fetch and store one page, and queue its unseen links"""
+        self.visited_urls.add(url)
+        print(f"  -> Scraping: {url} ({len(self.visited_urls)}/{self.max_pages}, depth {depth})")
+        self.rebuild_status["pages_visited"] = len(self.visited_urls)
+
+        page = await web_scraper_service.fetch_page(url)
+        if not page:
+            return
+
+        html, encoding = page
+        content, new_links = await web_scraper_service.parse_page(html, url, encoding)
+
+        if content:
+            # Hashing a long page takes milliseconds of CPU; keep it off the event loop
+            fingerprint = await asyncio.to_thread(self.fingerprints.fingerprint, content)
+            duplicate = self.fingerprints.find_duplicate(fingerprint)
+            if duplicate:
+                # Same content as an ingested page: skip embedding, just record the URL
+                parent_id, kind = duplicate
+                print(f"  -> Skipping {kind} duplicate content: {url}")
+                await self._add_source(parent_id, url, target)
+            else:
+                parent_id = vector_db_service.parent_id_for(url)
+                self.fingerprints.remember(fingerprint, parent_id)
+                self.sources[parent_id] = [url]
+                self._unstored.add(parent_id)
                 # Add the scraped content to the vector database
                 # The 'description' is the content itself, which will be vectorized.
-                vector_db_service.add_pattern(description=content, metadata={"source": url})
-            
+                self._pending.append((content, {"source": url, "sources": self.sources[parent_id]}))
+                if len(self._pending) >= vector_db_config.ingestion_batch_pages:
+                    batch, self._pending = self._pending, []
+                    await self._flush(batch, target)
+
+        if depth < self.max_depth:
             for link in new_links:
-                if link not in self.visited_urls:
-                    urls_to_visit.append(link)
-        
-        print(f"✅ Data ingestion complete. Visited {len(self.visited_urls)} pages.")
+                if link not in self.seen_urls:
+                    self.seen_urls.add(link)
+                    frontier.put_nowait((link, depth + 1))
+        self.rebuild_status["frontier"] = frontier.qsize()
+
+    async def _add_source(self, parent_id: str, url: str, target: str):
+        """Attach a duplicate page's URL to the page that holds its content"""
+        sources = self.sources[parent_id]
+        sources.append(url)
+        # Unwritten pages pick the URL up from this list when their batch is flushed
+        if parent_id not in self._unstored:
+            async with self._write_lock:
+                await self._store(vector_db_service.set_sources, parent_id, list(sources), target)
+
+    async def _flush(self, batch: List[Tuple[str, Dict[str, Any]]], target: str, wait: Optional[bool] = None):
+        """Embed and store a batch of pages off the event loop"""
+        if not batch:
+            return
+        # Store the sources known now; duplicates found during the write are patched in below
+        batch = [(content, {**metadata, "sources": list(metadata["sources"])}) for content, metadata in batch]
+        async with self._write_lock:
+            await self._store(vector_db_service.add_patterns, batch, wait, target)
+            for _, metadata in batch:
+                parent_id = vector_db_service.parent_id_for(metadata["source"])
+                self._unstored.discard(parent_id)
+                if len(self.sources[parent_id]) > len(metadata["sources"]):
+                    await self._store(
+                        vector_db_service.set_sources, parent_id, list(self.sources[parent_id]), target
+                    )
+
+    async def _store(self, write, *args):
+        """Run a vector DB write off the event loop, flagging its failures as fatal"""
+        try:
+            await asyncio.to_thread(write, *args)
+        except Exception as e:
+            raise IngestionStorageError(f"Storing pages failed: {e}") from e
 
 # Global instance
 data_ingestion_service = DataIngestionService()
\ No newline at end of file
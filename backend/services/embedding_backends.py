@@ -0,0 +1,103 @@
+from typing import List, Dict, Any
+import numpy as np
+import json
+import os
+
+# ONNX files looked up inside the model directory, per backend
+ONNX_MODEL_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx_int8": "onnx/model_int8.onnx"
+}
+
+class OnnxEmbeddingBackend:
+    """
+    CPU embedding backend that runs a sentence-transformers model exported to ONNX.
+    Mirrors the parts of the SentenceTransformer API the vector DB uses (encode,
+    get_sentence_embedding_dimension, max_seq_length, tokenizer), with mean pooling as
+    in all-MiniLM-L6-v2. Works with both the fp32 export and its int8 quantization.
+    """
+    def __init__(self, model_path: str, onnx_file: str, num_threads: int = 0):
+        # Optional dependencies: only needed when this backend is selected
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        onnx_path = os.path.join(model_path, onnx_file)
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"{onnx_path} not found; create it with: python export_onnx_embedder.py {model_path}"
+            )
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.max_seq_length = self._read_json(model_path, "sentence_bert_config.json").get("max_seq_length", 256)
+        self._dimension = self._read_json(model_path, "config.json")["hidden_size"]
+
+    def _read_json(self, model_path: str, name: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(model_path, name)) as f:
+                return json.load(f)
+        except OSError:
+            return {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        **kwargs
+    ) -> np.ndarray:
+        """Embed a string or a list of strings"""
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+
+        # Similar lengths in one batch keep padding (and wasted compute) small
+        order = np.argsort([-len(text) for text in texts])
+        vectors = np.empty((len(texts), self._dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            index = order[start:start + batch_size]
+            vectors[index] = self._encode_batch([texts[i] for i in index])
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+        return vectors[0] if single else vectors
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Mean-pooled token embeddings of one batch"""
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        feeds = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in encoded
+        }
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+def load_embedding_backend(name: str, model_path: str, num_threads: int = 0):
+    """
+    Load the embedding model with the named backend:
+    "sentence_transformers" (PyTorch, full precision), "onnx" or "onnx_int8".
+    """
+    if name in ONNX_MODEL_FILES:
+        return OnnxEmbeddingBackend(model_path, ONNX_MODEL_FILES[name], num_threads)
+    if name != "sentence_transformers":
+        raise ValueError(f"Unknown embedding backend: {name}")
+    # Importing sentence_transformers pulls in torch, which alone takes seconds
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_path)
@@ -0,0 +1,153 @@
+from typing import Dict, Any, List, Callable, Optional
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from config.vector_db_config import vector_db_config
+
+# Search queries are encoded before queued ingestion work
+PRIORITY_QUERY = 0
+PRIORITY_BULK = 1
+
+class _EmbedJob:
+    """Texts waiting to be encoded, and the future that receives their vectors"""
+    def __init__(self, texts: List[str], priority: int):
+        self.texts = texts
+        self.priority = priority
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class EmbeddingWorker:
+    """
+    Runs every SentenceTransformer encode on one dedicated thread.
+    Requests that arrive within a short window are merged into a single encode call, so
+    concurrent searches share a forward pass and the event loop never runs the model.
+    """
+    def __init__(
+        self,
+        model_loader: Callable[[], Any],
+        batch_window_ms: float = vector_db_config.embedding_batch_window_ms,
+        max_batch_texts: int = vector_db_config.embedding_max_batch_texts,
+        batch_size: int = vector_db_config.embedding_batch_size
+    ):
+        self._model_loader = model_loader
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_texts = max_batch_texts
+        self.batch_size = batch_size
+        self._queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {
+            "jobs": 0,
+            "batches": 0,
+            "texts": 0,
+            "max_batch_texts_seen": 0,
+            "encode_seconds": 0.0
+        }
+        self._queue_waits = deque(maxlen=500)
+
+    def _ensure_started(self):
+        """Start the worker thread on first use"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts: List[str], priority: int = PRIORITY_QUERY) -> Future:
+        """Queue texts for encoding; the future resolves to a (len(texts), dim) float32 array"""
+        self._ensure_started()
+        job = _EmbedJob(texts, priority)
+        self._queue.put((priority, next(self._sequence), job))
+        return job.future
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Normalized embeddings of texts, without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def embed_sync(self, texts: List[str], priority: int = PRIORITY_BULK) -> np.ndarray:
+        """
+        Normalized embeddings of texts, for callers already off the event loop.
+        Bulk work is queued in batch_size slices so search queries can cut in between them.
+        """
+        if priority == PRIORITY_QUERY or len(texts) <= self.batch_size:
+            return self.submit(texts, priority).result()
+        futures = [
+            self.submit(texts[start:start + self.batch_size], priority)
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+    def _run(self):
+        """Collect jobs for one batch window, then encode them together"""
+        while True:
+            jobs = [self._queue.get()[2]]
+            count = len(jobs[0].texts)
+            # Bulk batches stay small so a query never waits behind a long encode
+            limit = self.max_batch_texts if jobs[0].priority == PRIORITY_QUERY else self.batch_size
+            deadline = time.perf_counter() + self.batch_window
+            while count < limit:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)[2]
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                count += len(job.texts)
+            self._process(jobs)
+
+    def _process(self, jobs: List[_EmbedJob]):
+        """Encode a batch of jobs and hand each its slice of the vectors"""
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        started_at = time.perf_counter()
+        for job in jobs:
+            self._queue_waits.append(started_at - job.enqueued_at)
+        texts = [text for job in jobs for text in job.texts]
+        try:
+            vectors = np.asarray(
+                self._model_loader().encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True
+                ),
+                dtype=np.float32
+            )
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        self.stats["jobs"] += len(jobs)
+        self.stats["batches"] += 1
+        self.stats["texts"] += len(texts)
+        self.stats["max_batch_texts_seen"] = max(self.stats["max_batch_texts_seen"], len(texts))
+        self.stats["encode_seconds"] += time.perf_counter() - started_at
+        offset = 0
+        for job in jobs:
+            job.future.set_result(vectors[offset:offset + len(job.texts)])
+            offset += len(job.texts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching and queue latency metrics"""
+        waits = sorted(self._queue_waits)
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "encode_seconds": round(self.stats["encode_seconds"], 3),
+            "queue_depth": self._queue.qsize(),
+            "avg_batch_texts": round(self.stats["texts"] / batches, 2) if batches else 0.0,
+            "avg_jobs_per_batch": round(self.stats["jobs"] / batches, 2) if batches else 0.0,
+            "avg_queue_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "p95_queue_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 2) if waits else 0.0
+        }
@@ -0,0 +1,49 @@
+from typing import Dict, Any, Optional
+from collections import defaultdict, deque
+from agents.config import agent_config
+
+class LatencyTracker:
+    """
+    Rolling per-model latency samples for Ollama generations.
+    Two metrics are kept: "ttft" (seconds until the first token) and "total"
+    (seconds for the whole generation).
+    """
+    def __init__(self, window: int = 200):
+        self._samples: Dict[str, Dict[str, deque]] = defaultdict(
+            lambda: {"ttft": deque(maxlen=window), "total": deque(maxlen=window)}
+        )
+
+    def record(self, model: str, metric: str, seconds: float):
+        """Add one latency sample"""
+        self._samples[model][metric].append(seconds)
+
+    def percentile(self, model: str, metric: str, q: float) -> Optional[float]:
+        """The q-quantile of a metric, or None until enough samples were seen"""
+        samples = self._samples.get(model, {}).get(metric)
+        if not samples or len(samples) < agent_config.latency_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self, model: str) -> float:
+        """How long to wait for a first token from model before hedging"""
+        p = self.percentile(model, "ttft", agent_config.hedge_percentile)
+        if p is None:
+            return agent_config.hedge_default_delay_seconds
+        return max(p, agent_config.hedge_min_delay_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latency percentiles per model"""
+        stats = {}
+        for model, metrics in self._samples.items():
+            stats[model] = {
+                metric: {
+                    "samples": len(samples),
+                    "p50": self.percentile(model, metric, 0.5),
+                    "p95": self.percentile(model, metric, 0.95)
+                }
+                for metric, samples in metrics.items()
+            }
+        return stats
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import copy
+import hashlib
+import json
+import time
+from agents.config import agent_config
+from redis_db.connection import redis_manager
+
+class LLMResponseCache:
+    """
+    Two-tier cache for parsed structured LLM responses.
+    Lookups hit a bounded in-process LRU first and fall back to Redis, so entries survive
+    restarts and are shared between workers.
+    """
+    def __init__(
+        self,
+        max_entries: int = agent_config.llm_cache_max_entries,
+        ttl_seconds: int = agent_config.llm_cache_ttl_seconds,
+        enabled: bool = agent_config.llm_cache_enabled
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.key_prefix = "llm_cache:"
+        self.redis = redis_manager
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bypassed": 0
+        }
+
+    def make_key(self, model: str, prompt: str, options: Dict[str, Any]) -> str:
+        """Build a cache key from everything that influences the generation"""
+        material = json.dumps(
+            {"model": model, "prompt": prompt, "options": options},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, promoting Redis hits into the in-process tier"""
+        entry = self._entries.get(key)
+        if entry:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+
+        value = await self.redis.get_json(f"{self.key_prefix}{key}")
+        if value is not None:
+            self._store_local(key, value)
+            self.stats["redis_hits"] += 1
+            return copy.deepcopy(value)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Cache a successfully parsed response in both tiers"""
+        self._store_local(key, copy.deepcopy(value))
+        await self.redis.set_json(f"{self.key_prefix}{key}", value, expire=self.ttl_seconds)
+        self.stats["stores"] += 1
+
+    def record_bypass(self):
+        """Count a lookup that skipped the cache on purpose"""
+        self.stats["bypassed"] += 1
+
+    def _store_local(self, key: str, value: Dict[str, Any]):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the metrics endpoint"""
+        hits = self.stats["memory_hits"] + self.stats["redis_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+# Global cache instance
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,209 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, AsyncIterator, Callable
+import asyncio
+import heapq
+import itertools
+import time
+from agents.config import agent_config
+from services.session_manager import session_manager
+
+PRIORITY_INTERACTIVE = 0  # A user is waiting on the result (architecture design)
+PRIORITY_BULK = 1  # Background analysis (optimization scans)
+
+class LLMQueueFullError(Exception):
+    """Raised when the generation queue is at capacity and a new job is refused"""
+    pass
+
+@dataclass
+class _QueuedJob:
+    priority: int
+    session_id: Optional[str]
+    enqueued_at: float
+    future: asyncio.Future
+    position: int = 0
+    cancelled: bool = False
+
+class LLMScheduler:
+    """
+    Admission control for Ollama generations.
+    At most max_in_flight generations run at once (per_host_concurrency for each healthy
+    Ollama host, so capacity shrinks when hosts are ejected); the rest wait in a priority queue where
+    interactive work goes ahead of bulk work and sessions take turns within a priority.
+    Sessions are told their queue position through session_manager.set_queue_status.
+    """
+    def __init__(
+        self,
+        per_host_concurrency: int = agent_config.ollama_max_concurrency,
+        max_queue_depth: int = agent_config.ollama_max_queue_depth
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        # Replaced by OllamaService with the backend pool's live healthy host count
+        self._healthy_hosts: Callable[[], int] = lambda: len(agent_config.get_ollama_base_urls())
+        self.max_queue_depth = max_queue_depth
+        self._in_flight = 0
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._session_pending: Dict[str, int] = {}
+        self._recent_waits = deque(maxlen=200)
+        # Latest queue status to publish per session (None clears it), and the one task
+        # writing each session's status, so writes stay in order and stale ones are skipped
+        self._queue_updates: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._queue_writers: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "max_queue_depth_seen": 0
+        }
+
+    def set_host_count(self, healthy_hosts: Callable[[], int]):
+        """Size capacity from the number of currently healthy Ollama hosts"""
+        self._healthy_hosts = healthy_hosts
+
+    def capacity_changed(self):
+        """Called when the healthy host count changes; hands new slots to waiting jobs"""
+        self._dispatch()
+
+    @property
+    def max_in_flight(self) -> int:
+        # With no healthy host, one host's worth is still admitted so calls fail fast
+        # instead of queueing, and releases keep dispatching once hosts come back
+        return self.per_host_concurrency * max(self._healthy_hosts(), 1)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for *_, job in self._queue if not job.cancelled)
+
+    def has_idle_capacity(self) -> bool:
+        """True when a new generation would start immediately"""
+        return self._in_flight < self.max_in_flight and self.queue_depth == 0
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE, session_id: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a generation slot for the duration of the block"""
+        await self._acquire(priority, session_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int, session_id: Optional[str]):
+        """Wait until the scheduler grants a slot"""
+        self.stats["admitted"] += 1
+        if self.has_idle_capacity():
+            self._in_flight += 1
+            self._recent_waits.append(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue_depth:
+            self.stats["admitted"] -= 1
+            self.stats["rejected"] += 1
+            raise LLMQueueFullError(
+                f"LLM queue is full ({self.queue_depth} waiting). Please retry shortly."
+            )
+
+        job = _QueuedJob(
+            priority=priority,
+            session_id=session_id,
+            enqueued_at=time.perf_counter(),
+            future=asyncio.get_running_loop().create_future()
+        )
+        # Sessions take turns: a session's n-th waiting job sorts after every other
+        # session's earlier jobs of the same priority
+        session_round = 0
+        if session_id:
+            session_round = self._session_pending.get(session_id, 0)
+            self._session_pending[session_id] = session_round + 1
+        heapq.heappush(self._queue, (priority, session_round, next(self._sequence), job))
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth_seen"] = max(self.stats["max_queue_depth_seen"], self.queue_depth)
+        self._publish_positions()
+
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.future.done() and not job.future.cancelled():
+                # The slot was granted just as the caller went away
+                self._release()
+            else:
+                job.cancelled = True
+                self._forget_session_job(job)
+                self._publish_positions()
+            raise
+
+    def _release(self):
+        """Give a slot back and hand it to the next waiting job"""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to waiting jobs in priority order"""
+        while self._in_flight < self.max_in_flight and self._queue:
+            *_, job = heapq.heappop(self._queue)
+            if job.cancelled:
+                continue
+            self._in_flight += 1
+            self._forget_session_job(job)
+            self._recent_waits.append(time.perf_counter() - job.enqueued_at)
+            job.future.set_result(None)
+            if job.session_id:
+                self._notify_session(job.session_id, None)
+        self._publish_positions()
+
+    def _forget_session_job(self, job: _QueuedJob):
+        """Drop a job from its session's pending count"""
+        if not job.session_id:
+            return
+        remaining = self._session_pending.get(job.session_id, 1) - 1
+        if remaining > 0:
+            self._session_pending[job.session_id] = remaining
+        else:
+            self._session_pending.pop(job.session_id, None)
+
+    def _publish_positions(self):
+        """Report changed queue positions to the waiting sessions"""
+        waiting = [job for *_, job in sorted(self._queue) if not job.cancelled]
+        for position, job in enumerate(waiting, start=1):
+            if job.position == position:
+                continue
+            job.position = position
+            if job.session_id:
+                self._notify_session(job.session_id, {
+                    "queue_step": f"waiting_in_llm_queue (position {position} of {len(waiting)})",
+                    "queue_position": position
+                })
+
+    def _notify_session(self, session_id: str, status: Optional[Dict[str, Any]]):
+        """Publish a session's queue status (None once dispatched) without blocking the scheduler"""
+        self._queue_updates[session_id] = status
+        if session_id not in self._queue_writers:
+            self._queue_writers[session_id] = asyncio.create_task(self._write_queue_status(session_id))
+
+    async def _write_queue_status(self, session_id: str):
+        """Write a session's queue status until no newer one is pending"""
+        try:
+            while session_id in self._queue_updates:
+                status = self._queue_updates.pop(session_id)
+                try:
+                    await session_manager.set_queue_status(session_id, status)
+                except Exception as e:
+                    print(f"⚠️ Failed to publish queue position for session {session_id}: {e}")
+        finally:
+            self._queue_writers.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and wait times for the metrics endpoint"""
+        waits = sorted(self._recent_waits)
+        return {
+            **self.stats,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0
+        }
+
+# Global scheduler instance
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,121 @@
+from typing import Dict, Any, Optional, List
+from collections import deque
+import re
+from agents.config import agent_config
+from services.latency_tracker import latency_tracker
+from services.token_budget import token_budget
+
+# Prompt terms that usually mean a design with many interacting services
+COMPLEX_TERMS = re.compile(
+    r"\b(micro-?services?|multi-?region|multi-?tenant|kubernetes|eks|event[- ]driven|streaming|kafka|"
+    r"real[- ]time|machine learning|ml|analytics|data (lake|warehouse|pipeline)|compliance|hipaa|pci|"
+    r"gdpr|high availability|disaster recovery|failover|global)\b",
+    re.IGNORECASE
+)
+
+class ModelRouter:
+    """
+    Picks the model for an architecture generation.
+    Prompts are scored for complexity and mapped onto routing_models (smallest first); the
+    choice is then stepped down while the model's recent p95 generation time would not fit
+    the time left for the request.
+    """
+    def __init__(self):
+        self.latency = latency_tracker
+        self.stats = {
+            "decisions": 0,
+            "downgraded_for_budget": 0,
+            "by_model": {}
+        }
+        self.recent_decisions = deque(maxlen=50)
+
+    def complexity(self, prompt: str, context: Dict[str, Any]) -> float:
+        """Score how demanding a design request is, from 0 (trivial) to 1 (heavy)"""
+        score = 0.0
+        # Long, detailed prompts describe more components
+        score += min(token_budget.estimate_tokens(prompt) / 400, 1.0) * 0.3
+        terms = {m.group(0).lower() for m in COMPLEX_TERMS.finditer(prompt)}
+        score += min(len(terms) / 3, 1.0) * 0.3
+        if (context.get("concurrent_users") or 0) >= 1000 or (context.get("expected_total_users") or 0) >= 100000:
+            score += 0.2
+        # Tight latency targets of the designed system call for caching/CDN/edge decisions
+        latency_ms = context.get("latency_requirements")
+        if latency_ms and latency_ms <= 100:
+            score += 0.1
+        if context.get("constraints"):
+            score += 0.1
+        return round(min(score, 1.0), 2)
+
+    def route(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        time_budget_seconds: float,
+        available_models: List[str],
+        default_model: str
+    ) -> Dict[str, Any]:
+        """Choose a model for a request; returns the routing decision"""
+        models = [m for m in agent_config.routing_models if m in available_models]
+        complexity = self.complexity(prompt, context)
+        if not agent_config.routing_enabled or not models:
+            return self._decide(default_model, complexity, time_budget_seconds, "default", None)
+
+        index = min(int(complexity * len(models)), len(models) - 1)
+        reason = "complexity"
+        # Step down while the model has been slower than the time left for this request
+        while index > 0:
+            p95 = self.latency.percentile(models[index], "total", 0.95)
+            if p95 is None or p95 <= time_budget_seconds * agent_config.routing_budget_safety:
+                break
+            index -= 1
+            reason = "time_budget"
+        if reason == "time_budget":
+            self.stats["downgraded_for_budget"] += 1
+        return self._decide(
+            models[index], complexity, time_budget_seconds, reason,
+            self.latency.percentile(models[index], "total", 0.95)
+        )
+
+    def _decide(
+        self,
+        model: str,
+        complexity: float,
+        time_budget_seconds: float,
+        reason: str,
+        expected_seconds: Optional[float]
+    ) -> Dict[str, Any]:
+        """Record and return a routing decision"""
+        self.stats["decisions"] += 1
+        model_stats = self.stats["by_model"].setdefault(model, {"routed": 0, "within_budget": 0, "missed": 0})
+        model_stats["routed"] += 1
+        decision = {
+            "model": model,
+            "reason": reason,
+            "complexity": complexity,
+            "time_budget_seconds": round(time_budget_seconds, 1),
+            "expected_seconds": round(expected_seconds, 1) if expected_seconds is not None else None
+        }
+        print(f"🧭 Routed to {model} ({reason}, complexity {complexity}, budget {time_budget_seconds:.0f}s)")
+        return decision
+
+    def record_outcome(self, decision: Dict[str, Any], elapsed_seconds: float, success: bool):
+        """Record whether a routed generation produced a design within its time budget"""
+        model_stats = self.stats["by_model"][decision["model"]]
+        hit = success and elapsed_seconds <= decision["time_budget_seconds"]
+        model_stats["within_budget" if hit else "missed"] += 1
+        self.recent_decisions.append({**decision, "elapsed_seconds": round(elapsed_seconds, 1), "hit": hit})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing decisions and per-model hit rates"""
+        by_model = {}
+        for model, s in self.stats["by_model"].items():
+            finished = s["within_budget"] + s["missed"]
+            by_model[model] = {**s, "hit_rate": round(s["within_budget"] / finished, 3) if finished else None}
+        return {
+            "decisions": self.stats["decisions"],
+            "downgraded_for_budget": self.stats["downgraded_for_budget"],
+            "by_model": by_model,
+            "recent_decisions": list(self.recent_decisions)
+        }
+
+model_router = ModelRouter()
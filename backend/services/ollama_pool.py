@@ -0,0 +1,188 @@
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, AsyncIterator, Iterable, Callable
+import asyncio
+import time
+import httpx
+import ollama
+from agents.config import agent_config
+
+class NoHealthyBackendError(Exception):
+    """Raised when no healthy Ollama host can serve the requested model"""
+    pass
+
+class OllamaBackend:
+    """One Ollama host with its own pooled client and health state"""
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        # ollama.AsyncClient builds its own httpx client, so the connection pool is created
+        # here as a transport and handed in; close() shuts down the transport we own
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=agent_config.ollama_max_connections,
+                max_keepalive_connections=agent_config.ollama_max_connections
+            )
+        )
+        self.client = ollama.AsyncClient(
+            host=base_url,
+            timeout=httpx.Timeout(agent_config.timeout_seconds, connect=agent_config.ollama_connect_timeout),
+            transport=self.transport
+        )
+        self.models: List[str] = []
+        self.healthy = False
+        self.outstanding = 0
+        self.routed = 0
+        self.consecutive_failures = 0
+        self.last_probe_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def probe(self) -> bool:
+        """Refresh the model list; a successful probe (re)admits the host"""
+        self.last_probe_at = time.time()
+        try:
+            models = await asyncio.wait_for(
+                self.client.list(),
+                timeout=agent_config.ollama_connect_timeout
+            )
+            self.models = [model['name'] for model in models['models']]
+            if not self.healthy:
+                print(f"✅ Ollama host {self.base_url} is healthy. Models: {self.models}")
+            self.healthy = True
+            self.consecutive_failures = 0
+            self.last_error = None
+        except Exception as e:
+            if self.healthy:
+                print(f"❌ Ollama host {self.base_url} failed its health check: {e}")
+            self.healthy = False
+            self.last_error = str(e)
+        return self.healthy
+
+    async def close(self):
+        """Close the host's pooled connections"""
+        await self.transport.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "models": self.models,
+            "outstanding": self.outstanding,
+            "routed": self.routed,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error
+        }
+
+class OllamaBackendPool:
+    """
+    Routes generations across several Ollama hosts.
+    Each call goes to the healthy host that has the model and the least outstanding work.
+    Hosts that keep failing are ejected and re-admitted by the periodic health probe.
+    """
+    def __init__(
+        self,
+        base_urls: List[str] = agent_config.get_ollama_base_urls(),
+        health_check_interval: float = agent_config.ollama_health_check_interval,
+        eject_after_failures: int = agent_config.ollama_eject_after_failures
+    ):
+        self.backends = [OllamaBackend(url) for url in base_urls]
+        self.health_check_interval = health_check_interval
+        self.eject_after_failures = eject_after_failures
+        self._health_task: Optional[asyncio.Task] = None
+        # Called whenever the healthy host count changes (set by OllamaService to the scheduler)
+        self.on_capacity_change: Optional[Callable[[], None]] = None
+        self.stats = {
+            "routed": 0,
+            "ejections": 0
+        }
+
+    async def probe_all(self):
+        """Probe every host concurrently"""
+        healthy = self.healthy_count()
+        await asyncio.gather(*(backend.probe() for backend in self.backends))
+        if self.healthy_count() != healthy:
+            self._capacity_changed()
+
+    def start_health_checks(self):
+        """Start the background probe loop"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.probe_all()
+
+    def healthy_count(self) -> int:
+        """Number of hosts currently taking generations"""
+        return sum(1 for backend in self.backends if backend.healthy)
+
+    def available_models(self) -> List[str]:
+        """Models served by at least one healthy host"""
+        models = []
+        for backend in self.backends:
+            if backend.healthy:
+                models.extend(m for m in backend.models if m not in models)
+        return models
+
+    def pick(self, model: str, exclude: Iterable[OllamaBackend] = ()) -> OllamaBackend:
+        """Healthy host with the model and the fewest outstanding generations (ties go to the least used)"""
+        candidates = [
+            backend for backend in self.backends
+            if backend.healthy and model in backend.models and backend not in exclude
+        ]
+        if not candidates:
+            raise NoHealthyBackendError(f"No healthy Ollama host serves model {model}")
+        return min(candidates, key=lambda backend: (backend.outstanding, backend.routed))
+
+    @asynccontextmanager
+    async def lease(self, model: str, exclude: Iterable[OllamaBackend] = ()) -> AsyncIterator[OllamaBackend]:
+        """Route one call to a host, tracking its outstanding work and failures"""
+        backend = self.pick(model, exclude)
+        backend.outstanding += 1
+        backend.routed += 1
+        self.stats["routed"] += 1
+        try:
+            yield backend
+            backend.consecutive_failures = 0
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except Exception as e:
+            if self.is_host_failure(e):
+                self.mark_failure(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+
+    def is_host_failure(self, error: Exception) -> bool:
+        """Connection problems and server errors count against a host; slow or bad requests do not"""
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code >= 500
+        return False
+
+    def mark_failure(self, backend: OllamaBackend, error: Exception):
+        """Eject a host after repeated failures; the health loop re-admits it"""
+        backend.consecutive_failures += 1
+        backend.last_error = str(error)
+        if backend.healthy and backend.consecutive_failures >= self.eject_after_failures:
+            backend.healthy = False
+            self.stats["ejections"] += 1
+            print(f"🚫 Ejected Ollama host {backend.base_url} after {backend.consecutive_failures} failures")
+            self._capacity_changed()
+
+    def _capacity_changed(self):
+        if self.on_capacity_change:
+            self.on_capacity_change()
+
+    async def close(self):
+        """Stop probing and close every host's connections"""
+        if self._health_task:
+            self._health_task.cancel()
+        for backend in self.backends:
+            await backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backends": [backend.get_stats() for backend in self.backends]
+        }
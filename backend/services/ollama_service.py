@@ -1,8 +1,18 @@
-import ollama
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Union, Tuple
+from contextlib import aclosing
+from collections import deque
 from agents.config import agent_config
+from services.llm_cache import llm_response_cache
+from services.llm_scheduler import llm_scheduler, LLMQueueFullError, PRIORITY_INTERACTIVE
+from services.single_flight import SingleFlight
+from services.structured_output import JsonObjectScanner, extract_json_object
+from services.token_budget import token_budget
+from services.ollama_pool import OllamaBackendPool, OllamaBackend, NoHealthyBackendError
+from services.latency_tracker import latency_tracker
 import json
+import hashlib
+import time
 
 class OllamaService:
     """Service for interacting with local Ollama models"""
@@ -12,35 +22,160 @@ class OllamaService:
         self.default_model = agent_config.default_model
         self.fallback_model = agent_config.fallback_model
         self.temperature = agent_config.temperature
-        self.client = ollama.Client(host=self.base_url)
-        self.available_models = []
-        self._check_ollama_connection()
+        self.timeout_seconds = agent_config.timeout_seconds
+        self.keep_alive = agent_config.ollama_keep_alive
+        # One pooled async client per Ollama host for the whole process; calls are routed
+        # to the least busy healthy host that has the model
+        self.pool = OllamaBackendPool()
+        # Bounds and orders the generations in flight against Ollama
+        self.scheduler = llm_scheduler
+        self.scheduler.set_host_count(self.pool.healthy_count)
+        # Jobs queued while hosts were down start as soon as a probe re-admits one
+        self.pool.on_capacity_change = self.scheduler.capacity_changed
+        # Joins callers to identical generations that are already running
+        self.single_flight = SingleFlight()
+        self.token_budget = token_budget
+        self.stats = {
+            "early_stops": 0,
+            "generations": 0,
+            "prompt_tokens": 0,
+            "eval_tokens": 0,
+            "prompt_eval_ms": 0.0,
+            "hedges": 0,
+            "hedge_wins": 0
+        }
+        self.recent_calls = deque(maxlen=50)
+        self.cache = llm_response_cache
+        # Per-model time-to-first-token and duration, used to decide when to hedge
+        self.latency = latency_tracker
     
-    def _check_ollama_connection(self):
-        """Check if Ollama is running and get available models"""
-        try:
-            # Create client
-            client = ollama.Client(host=self.base_url)
-            
-            # Get list of available models
-            models = client.list()
-            self.available_models = [model['name'] for model in models['models']]
-            print(f"✅ Connected to Ollama. Available models: {self.available_models}")
-            
-            # Check if default model is available
-            if self.default_model not in self.available_models:
-                print(f"⚠️  Default model {self.default_model} not found. Available: {self.available_models}")
-                if self.fallback_model in self.available_models:
-                    self.default_model = self.fallback_model
-                    print(f"📝 Using fallback model: {self.default_model}")
-                elif self.available_models:
-                    self.default_model = self.available_models[0]
-                    print(f"📝 Using first available model: {self.default_model}")
+    @property
+    def available_models(self) -> List[str]:
+        """Models served by at least one healthy Ollama host"""
+        return self.pool.available_models()
+    
+    async def connect(self):
+        """Connect to Ollama, load the available models and start health checks"""
+        await self._check_ollama_connection()
+        self.pool.start_health_checks()
+    
+    async def close(self):
+        """Stop health checks and close the pooled HTTP connections"""
+        await self.pool.close()
+    
+    async def warm_up(self, system_prompts: List[str]):
+        """
+        Load the default model and prime Ollama's prompt cache with the agents' system prompts,
+        so the first real request after startup pays neither the model load nor the prefix eval.
+        Every healthy host with the default model is warmed.
+        """
+        if not agent_config.ollama_warmup_enabled:
+            return
+        if not self.available_models:
+            await self._check_ollama_connection()
+        if not self.available_models:
+            print("⚠️  Skipping Ollama warm-up: no models available")
+            return
         
-        except Exception as e:
-            print(f"❌ Failed to connect to Ollama: {e}")
+        backends = [
+            backend for backend in self.pool.backends
+            if backend.healthy and self.default_model in backend.models
+        ]
+        await asyncio.gather(*(
+            self._warm_up_backend(backend, system_prompts) for backend in backends
+        ))
+    
+    async def _warm_up_backend(self, backend: OllamaBackend, system_prompts: List[str]):
+        """Warm one Ollama host"""
+        for system_prompt in system_prompts:
+            messages = self._build_messages(self._json_system_prompt(system_prompt), "Reply with {}")
+            started_at = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    backend.client.chat(
+                        model=self.default_model,
+                        messages=messages,
+                        options={
+                            **self._generation_options(messages),
+                            'num_ctx': agent_config.ollama_warmup_num_ctx,
+                            'num_predict': 1
+                        },
+                        keep_alive=self.keep_alive
+                    ),
+                    timeout=self.timeout_seconds
+                )
+                print(f"🔥 Warmed up {self.default_model} on {backend.base_url} in {time.perf_counter() - started_at:.1f}s")
+            except Exception as e:
+                print(f"⚠️  Ollama warm-up failed on {backend.base_url}: {e}")
+                return
+    
+    async def _check_ollama_connection(self):
+        """Check which Ollama hosts are up and get available models"""
+        await self.pool.probe_all()
+        if not self.available_models:
+            print("❌ Failed to connect to Ollama: no healthy host")
             print("Make sure Ollama is running with: ollama serve")
-            self.available_models = []
+            return
+        
+        print(f"✅ Connected to Ollama. Available models: {self.available_models}")
+        
+        # Check if default model is available
+        if self.default_model not in self.available_models:
+            print(f"⚠️  Default model {self.default_model} not found. Available: {self.available_models}")
+            if self.fallback_model in self.available_models:
+                self.default_model = self.fallback_model
+                print(f"📝 Using fallback model: {self.default_model}")
+            elif self.available_models:
+                self.default_model = self.available_models[0]
+                print(f"📝 Using first available model: {self.default_model}")
+    
+    def _build_messages(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Construct the chat messages sent to the model.
+        The static system prompt always comes first and alone, so it forms a stable prefix
+        that Ollama can reuse from its KV cache; everything request-specific goes after it.
+        """
+        user_content = user_prompt
+        
+        # Add context if provided, minified and without values the user prompt already contains
+        context = self.token_budget.dedupe_context(context, user_prompt)
+        if context:
+            user_content += f"\nContext: {self.token_budget.compact_json(context)}"
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ]
+    
+    def _messages_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Estimated prompt tokens of a chat"""
+        return sum(self.token_budget.estimate_tokens(m["content"]) for m in messages)
+    
+    def _generation_options(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Sampling options for a generation, with a context window sized to the prompt"""
+        return {
+            'temperature': self.temperature,
+            'num_ctx': self.token_budget.choose_num_ctx(self._messages_tokens(messages)),
+            'top_p': agent_config.top_p,
+            'repeat_penalty': agent_config.repeat_penalty
+        }
+    
+    async def _resolve_model(self, model: Optional[str]) -> str:
+        """Pick the model for a call and make sure it is available"""
+        # Ollama may have come up after startup; refresh the model list lazily
+        if not self.available_models:
+            await self._check_ollama_connection()
+        
+        model = model or self.default_model
+        
+        if model not in self.available_models:
+            raise ValueError(f"Model {model} not available. Available models: {self.available_models}")
+        return model
     
     async def generate_response(
         self, 
@@ -48,90 +183,462 @@ class OllamaService:
         user_prompt: str, 
         context: Optional[Dict[str, Any]] = None,
         model: Optional[str] = None,
-        stream: bool = False
+        stream: bool = False,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: Optional[str] = None
     ) -> str:
         """Generate response using Ollama model"""
         
-        model = model or self.default_model
-        
-        if model not in self.available_models:
-            raise ValueError(f"Model {model} not available. Available models: {self.available_models}")
+        # Generations always stream internally so identical in-flight calls can share one run
+        chunks = []
+        async for token in self.stream_response(
+            system_prompt, user_prompt, context, model, timeout,
+            priority=priority, session_id=session_id
+        ):
+            chunks.append(token)
+        return "".join(chunks).strip()
+    
+    async def stream_response(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: Optional[str] = None,
+        response_format: Union[str, Dict[str, Any]] = "",
+        hedge: bool = False,
+        answered_by: Optional[Dict[str, str]] = None,
+        stop_at_object_close: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Yield response tokens from the Ollama model as they are generated.
+        A hedge is a deliberate duplicate of a stalled call: it is never coalesced with
+        the call it races and never falls back to another model itself.
+        answered_by["model"] is set to the model that actually produced the tokens.
+        With stop_at_object_close the generation ends once the top-level JSON object closes.
+        """
         
-        # Construct the full prompt
-        full_prompt = f"""System: {system_prompt}\n\nUser: {user_prompt}"""
+        model = await self._resolve_model(model)
+        messages = self._build_messages(system_prompt, user_prompt, context)
+        options = self._generation_options(messages)
+        produced = False
         
-        # Add context if provided
-        if context:
-            context_text = f"\nContext: {json.dumps(context, indent=2)}"
-            full_prompt += context_text
-        
-        full_prompt += "\n\nAssistant:"
+        def generation() -> AsyncIterator[str]:
+            tokens = self._run_generation(
+                model, messages, options, timeout, priority, session_id, response_format
+            )
+            # Stopped in the shared generation, so coalesced callers count one early stop
+            return self._until_object_closes(tokens) if stop_at_object_close else tokens
         
         try:
-            # Create client for this request
-            client = ollama.Client(host=self.base_url)
-            
-            # Use asyncio to run the synchronous ollama call
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.generate(
-                    model=model,
-                    prompt=full_prompt,
-                    options={
-                        'temperature': self.temperature,
-                        'num_ctx': 4096,  # Context window
-                        'top_p': agent_config.top_p,
-                        'repeat_penalty': agent_config.repeat_penalty
-                    }
-                )
-            )
-            
-            return response['response'].strip()
+            # Byte-identical requests already running are joined instead of regenerated
+            async with aclosing(self.single_flight.stream(
+                self._generation_key(
+                    model, messages, options, response_format, hedge, stop_at_object_close
+                ),
+                generation
+            )) as tokens:
+                async for token in tokens:
+                    if not produced and answered_by is not None:
+                        answered_by["model"] = model
+                    produced = True
+                    yield token
         
+        except LLMQueueFullError:
+            # Admission control refused the job; a fallback model would hit the same queue
+            raise
         except Exception as e:
-            # Try fallback model if available
-            if model != self.fallback_model and self.fallback_model in self.available_models:
+            # Fall back only if nothing has been sent to the caller yet
+            if (not produced and not hedge and model != self.fallback_model
+                    and self.fallback_model in self.available_models):
                 print(f"⚠️  Model {model} failed, trying fallback {self.fallback_model}")
-                return await self.generate_response(
-                    system_prompt, 
-                    user_prompt, 
-                    context, 
-                    self.fallback_model
-                )
+                async with aclosing(self.stream_response(
+                    system_prompt,
+                    user_prompt,
+                    context,
+                    self.fallback_model,
+                    timeout=timeout,
+                    priority=priority,
+                    session_id=session_id,
+                    response_format=response_format,
+                    answered_by=answered_by,
+                    stop_at_object_close=stop_at_object_close
+                )) as tokens:
+                    async for token in tokens:
+                        yield token
             else:
                 raise Exception(f"Ollama generation failed: {str(e)}")
     
+    def _generation_key(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        response_format: Union[str, Dict[str, Any]],
+        hedge: bool = False,
+        stop_at_object_close: bool = False
+    ) -> str:
+        """Identity of a generation, used to coalesce duplicates"""
+        material = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "options": options,
+                "format": response_format,
+                "hedge": hedge,
+                "stop_at_object_close": stop_at_object_close
+            },
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    async def _run_generation(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        timeout: Optional[float],
+        priority: int,
+        session_id: Optional[str],
+        response_format: Union[str, Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """
+        Run one streamed generation against the least busy Ollama host inside a scheduler slot.
+        If a host dies before producing anything, the call moves on to the next healthy host.
+        """
+        async with self.scheduler.slot(priority, session_id):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + (timeout or self.timeout_seconds)
+            tried: List[OllamaBackend] = []
+            while True:
+                produced = False
+                try:
+                    async with self.pool.lease(model, exclude=tried) as backend:
+                        tried.append(backend)
+                        async with aclosing(self._stream_from_backend(
+                            backend, model, messages, options, response_format, deadline
+                        )) as tokens:
+                            async for token in tokens:
+                                produced = True
+                                yield token
+                    return
+                except NoHealthyBackendError:
+                    raise
+                except Exception as e:
+                    if produced or not self.pool.is_host_failure(e):
+                        raise
+                    print(f"⚠️  Ollama host {tried[-1].base_url} failed ({e}), retrying on another host")
+    
+    async def _stream_from_backend(
+        self,
+        backend: OllamaBackend,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        response_format: Union[str, Dict[str, Any]],
+        deadline: float
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion from one Ollama host"""
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        stream = await asyncio.wait_for(
+            backend.client.chat(
+                model=model,
+                messages=messages,
+                format=response_format,
+                options=options,
+                keep_alive=self.keep_alive,
+                stream=True
+            ),
+            timeout=max(deadline - loop.time(), 0)
+        )
+        generated_tokens = 0
+        final_part = None
+        try:
+            while True:
+                try:
+                    part = await asyncio.wait_for(
+                        stream.__anext__(),
+                        timeout=max(deadline - loop.time(), 0)
+                    )
+                except StopAsyncIteration:
+                    break
+                token = part.get('message', {}).get('content', '')
+                if token:
+                    # Ollama streams one token per chunk
+                    if generated_tokens == 0:
+                        self.latency.record(model, "ttft", loop.time() - started_at)
+                    generated_tokens += 1
+                    yield token
+                if part.get('done'):
+                    final_part = part
+                    self.latency.record(model, "total", loop.time() - started_at)
+                    break
+        finally:
+            # Closing the stream drops the HTTP response so Ollama stops generating
+            await stream.aclose()
+            # Stopped early streams never see Ollama's final stats, so count what was generated
+            self._record_call(model, messages, options, final_part or {'eval_count': generated_tokens})
+    
+    def _json_system_prompt(self, system_prompt: str) -> str:
+        """Enhanced system prompt for JSON output"""
+        return f"""{system_prompt}
+
+IMPORTANT: Your response MUST be valid JSON format. Do not include any text before or after the JSON object.
+Start your response with {{ and end with }}.
+"""
+    
+    def _structured_format(self, schema: Optional[Dict[str, Any]]) -> Union[str, Dict[str, Any]]:
+        """Ollama response format for a structured call: the JSON schema, or plain JSON mode"""
+        if schema and agent_config.ollama_structured_format == "schema":
+            return schema
+        return "json" if agent_config.ollama_structured_format in ("schema", "json") else ""
+    
+    def _structured_cache_key(
+        self,
+        json_system_prompt: str,
+        user_prompt: str,
+        context: Optional[Dict[str, Any]],
+        model: str,
+        response_format: Union[str, Dict[str, Any]],
+        use_cache: bool
+    ) -> Optional[str]:
+        """Cache key for a structured generation, or None when the cache is bypassed"""
+        if not (use_cache and self.cache.enabled):
+            self.cache.record_bypass()
+            return None
+        messages = self._build_messages(json_system_prompt, user_prompt, context)
+        return self.cache.make_key(
+            model,
+            json.dumps(messages),
+            {**self._generation_options(messages), "format": response_format}
+        )
+    
     async def generate_structured_response(
         self,
         system_prompt: str,
         user_prompt: str,
         context: Optional[Dict[str, Any]] = None,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Generate structured JSON response"""
         
-        # Enhanced system prompt for JSON output
-        json_system_prompt = f"""{system_prompt}
-
-IMPORTANT: Your response MUST be valid JSON format. Do not include any text before or after the JSON object.
-Start your response with {{ and end with }}.
-"""
-        
-        response_text = await self.generate_response(
-            json_system_prompt,
+        chunks = []
+        async for token in self.stream_structured_response(
+            system_prompt,
             user_prompt,
             context,
-            model
+            model,
+            use_cache=use_cache,
+            priority=priority,
+            session_id=session_id,
+            schema=schema
+        ):
+            chunks.append(token)
+        
+        return self.parse_structured_response("".join(chunks))
+    
+    async def stream_structured_response(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the tokens of a structured JSON response; parse the joined text with parse_structured_response.
+        Generation is constrained to JSON (or to schema, when given) and stops as soon as the
+        top-level object closes.
+        """
+        
+        model = await self._resolve_model(model)
+        json_system_prompt = self._json_system_prompt(system_prompt)
+        response_format = self._structured_format(schema)
+        
+        cache_key = self._structured_cache_key(
+            json_system_prompt, user_prompt, context, model, response_format, use_cache
         )
+        if cache_key:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                # A cache hit is replayed as a single chunk
+                yield json.dumps(cached)
+                return
         
-        try:
-            # Try to parse JSON from response
-            import re
+        chunks = []
+        answered_by: Dict[str, str] = {}
+        async with aclosing(self._hedged_structured_stream(
+            json_system_prompt, user_prompt, context, model, priority, session_id, response_format,
+            answered_by
+        )) as tokens:
+            async for token in tokens:
+                chunks.append(token)
+                yield token
+        
+        if cache_key:
+            result = self.parse_structured_response("".join(chunks))
+            # Only cache real JSON, never the raw_response fallbacks
+            if not result.get("raw_response"):
+                answered = answered_by.get("model", model)
+                if answered != model:
+                    # A fallback or hedge answered; file it under that model, not the requested one
+                    cache_key = self._structured_cache_key(
+                        json_system_prompt, user_prompt, context, answered, response_format, use_cache
+                    )
+                await self.cache.set(cache_key, result)
+    
+    async def _until_object_closes(self, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass tokens through until the top-level JSON object is complete"""
+        scanner = JsonObjectScanner()
+        async with aclosing(tokens):
+            async for token in tokens:
+                yield token
+                if scanner.feed(token):
+                    # Anything the model writes after the closing brace is wasted work
+                    self.stats["early_stops"] += 1
+                    return
+    
+    def _hedge_model(self, model: str) -> Optional[str]:
+        """Model to hedge a stalled call with, or None if there is nothing to hedge on"""
+        if not agent_config.hedge_enabled:
+            return None
+        if self.fallback_model != model and self.fallback_model in self.available_models:
+            return self.fallback_model
+        # Same model on a second host; the pool routes the hedge away from the busy one
+        hosts = [b for b in self.pool.backends if b.healthy and model in b.models]
+        return model if len(hosts) > 1 else None
+    
+    async def _hedged_structured_stream(
+        self,
+        json_system_prompt: str,
+        user_prompt: str,
+        context: Optional[Dict[str, Any]],
+        model: str,
+        priority: int,
+        session_id: Optional[str],
+        response_format: Union[str, Dict[str, Any]],
+        answered_by: Dict[str, str]
+    ) -> AsyncIterator[str]:
+        """
+        Stream a structured generation, hedging it when the model stalls.
+        If no token arrives within the model's recent p95 time-to-first-token and the
+        scheduler has a free slot, the prompt is also started on the hedge model. The first
+        of the two to finish with valid JSON wins and the other is cancelled. A hedged
+        result arrives as a single chunk. answered_by["model"] names the model that won.
+        """
+        primary = self.stream_response(
+            json_system_prompt, user_prompt, context, model,
+            priority=priority, session_id=session_id, response_format=response_format,
+            answered_by=answered_by, stop_at_object_close=True
+        )
+        async with aclosing(primary):
+            hedge_model = self._hedge_model(model)
+            if hedge_model is None:
+                async for token in primary:
+                    yield token
+                return
             
-            # Extract JSON from response (in case there's extra text)
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_text = json_match.group()
+            first_token = asyncio.ensure_future(primary.__anext__())
+            try:
+                await asyncio.wait({first_token}, timeout=self.latency.hedge_delay(model))
+                if first_token.done() or not self.scheduler.has_idle_capacity():
+                    # Healthy start, or hedging would only compete with queued work
+                    try:
+                        token = await first_token
+                    except StopAsyncIteration:
+                        return
+                    yield token
+                    async for token in primary:
+                        yield token
+                    return
+                
+                self.stats["hedges"] += 1
+                print(f"⏱️  No output from {model} after {self.latency.hedge_delay(model):.1f}s, hedging on {hedge_model}")
+                hedge_answer: Dict[str, str] = {}
+                hedge = self.stream_response(
+                    json_system_prompt, user_prompt, context, hedge_model,
+                    priority=priority, session_id=session_id, response_format=response_format,
+                    hedge=True, answered_by=hedge_answer, stop_at_object_close=True
+                )
+                async with aclosing(hedge):
+                    winner, text = await self._race_structured(primary, first_token, hedge)
+                    if winner == "hedge":
+                        answered_by.update(hedge_answer)
+                    yield text
+            finally:
+                if not first_token.done():
+                    first_token.cancel()
+                    await asyncio.wait({first_token})
+    
+    async def _race_structured(
+        self,
+        primary: AsyncIterator[str],
+        primary_first: asyncio.Future,
+        hedge: AsyncIterator[str]
+    ) -> Tuple[str, str]:
+        """Run the primary and hedge generations to completion; first valid JSON wins. Returns (winner, text)."""
+        async def collect(tokens: AsyncIterator[str], first: Optional[asyncio.Future] = None) -> str:
+            chunks = []
+            if first is not None:
+                try:
+                    chunks.append(await first)
+                except StopAsyncIteration:
+                    return ""
+            async for token in tokens:
+                chunks.append(token)
+            return "".join(chunks)
+        
+        tasks = {
+            asyncio.create_task(collect(primary, primary_first)): "primary",
+            asyncio.create_task(collect(hedge)): "hedge"
+        }
+        results: Dict[str, str] = {}
+        errors: Dict[str, BaseException] = {}
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    if task.exception() is not None:
+                        errors[name] = task.exception()
+                        continue
+                    results[name] = task.result()
+                    if not self.parse_structured_response(results[name]).get("raw_response"):
+                        if name == "hedge":
+                            self.stats["hedge_wins"] += 1
+                        return name, results[name]
+        finally:
+            # Cancelling the loser closes its stream, which stops Ollama and frees its slot
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Neither produced valid JSON; hand back whatever text there is for the caller to parse
+        if results.get("primary"):
+            return "primary", results["primary"]
+        if results:
+            return "hedge", results.get("hedge", "")
+        raise errors.get("primary") or errors["hedge"]
+    
+    def parse_structured_response(self, response_text: str) -> Dict[str, Any]:
+        """Parse a JSON object out of a model response"""
+        try:
+            # Extract the first balanced JSON object (in case there's extra text)
+            json_text = extract_json_object(response_text)
+            if json_text:
                 return json.loads(json_text)
             else:
                 # If no JSON found, create a structured response
@@ -150,19 +657,66 @@ Start your response with {{ and end with }}.
                 "raw_response": True
             }
     
+    def _record_call(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        final_part: Dict[str, Any]
+    ):
+        """Record token counts and prompt-eval timings reported by Ollama for a generation"""
+        estimated_prompt_tokens = self._messages_tokens(messages)
+        prompt_tokens = final_part.get('prompt_eval_count') or 0
+        eval_tokens = final_part.get('eval_count') or 0
+        prompt_eval_ms = (final_part.get('prompt_eval_duration') or 0) / 1e6
+        self.stats["generations"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["eval_tokens"] += eval_tokens
+        self.stats["prompt_eval_ms"] += prompt_eval_ms
+        call = {
+            "model": model,
+            "completed": 'done' in final_part,
+            "num_ctx": options.get('num_ctx'),
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": eval_tokens,
+            "prompt_eval_ms": round(prompt_eval_ms, 1),
+            "load_ms": round((final_part.get('load_duration') or 0) / 1e6, 1)
+        }
+        if 'done' in final_part:
+            # Ollama only evaluates the part of the prompt that is not already in its KV cache
+            call["prefix_reuse_ratio"] = round(max(0.0, 1 - prompt_tokens / estimated_prompt_tokens), 3)
+        self.recent_calls.append(call)
+    
     def is_available(self) -> bool:
         """Check if Ollama service is available"""
         return len(self.available_models) > 0
     
+    def get_metrics(self) -> Dict[str, Any]:
+        """Runtime metrics for the /metrics endpoint"""
+        return {
+            "available_models": self.available_models,
+            "default_model": self.default_model,
+            **self.stats,
+            "pool": self.pool.get_stats(),
+            "cache": self.cache.get_stats(),
+            "scheduler": self.scheduler.get_stats(),
+            "single_flight": self.single_flight.get_stats(),
+            "avg_prompt_eval_ms": round(self.stats["prompt_eval_ms"] / self.stats["generations"], 1) if self.stats["generations"] else 0.0,
+            "token_budget": self.token_budget.get_stats(),
+            "latency": self.latency.get_stats(),
+            "recent_calls": list(self.recent_calls)
+        }
+    
     def get_available_models(self) -> List[str]:
         """Get list of available models"""
         return self.available_models
     
-    def get_model_info(self, model_name: str) -> Dict[str, Any]:
+    async def get_model_info(self, model_name: str) -> Dict[str, Any]:
         """Get information about a specific model"""
         try:
-            client = ollama.Client(host=self.base_url)
-            info = client.show(model_name)
+            async with self.pool.lease(model_name) as backend:
+                info = await backend.client.show(model_name)
             return info
         except Exception as e:
             return {"error": str(e)}
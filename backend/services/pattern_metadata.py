@@ -0,0 +1,46 @@
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+import re
+
+# Keywords that put a reference architecture in a service family; a family needs at least
+# MIN_FAMILY_MENTIONS mentions so passing references in navigation text don't count
+SERVICE_FAMILIES = {
+    "serverless": ["serverless", "lambda", "api gateway", "step functions", "eventbridge", "app runner"],
+    "containers": ["container", "ecs", "eks", "fargate", "kubernetes", "docker", "ecr"],
+    "data": ["data lake", "analytics", "redshift", "glue", "athena", "emr", "kinesis", "etl", "data pipeline"],
+    "databases": ["database", "rds", "aurora", "dynamodb", "elasticache", "documentdb", "neptune"],
+    "ml": ["machine learning", "sagemaker", "bedrock", "generative ai", "inference", "model training"],
+    "networking": ["vpc", "cloudfront", "route 53", "transit gateway", "load balancer", "direct connect"],
+    "storage": ["s3", "efs", "fsx", "storage gateway", "backup"],
+    "security": ["iam", "kms", "waf", "guardduty", "security hub", "cognito"]
+}
+MIN_FAMILY_MENTIONS = 2
+
+REGION = re.compile(r"\b(?:us|eu|ap|sa|ca|me|af|il|mx)-(?:north|south|east|west|central|northeast|northwest|southeast|southwest)-\d\b")
+_FAMILY_PATTERNS = {
+    family: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")s?\b", re.IGNORECASE)
+    for family, keywords in SERVICE_FAMILIES.items()
+}
+
+def service_families(text: str, min_mentions: int = MIN_FAMILY_MENTIONS) -> List[str]:
+    """Service families a text is about"""
+    return sorted(
+        family for family, pattern in _FAMILY_PATTERNS.items()
+        if len(pattern.findall(text)) >= min_mentions
+    )
+
+def section_of(url: Optional[str]) -> str:
+    """Site section of a page: the first segment of its URL path"""
+    if not url:
+        return "unknown"
+    segments = [segment for segment in urlparse(url).path.lower().split("/") if segment]
+    return segments[0] if segments else "root"
+
+def extract_pattern_fields(url: Optional[str], content: str, ingestion_version: str) -> Dict[str, Any]:
+    """Structured, filterable payload fields of a scraped page"""
+    return {
+        "section": section_of(url),
+        "service_families": service_families(content),
+        "regions": sorted(set(REGION.findall(content.lower()))),
+        "ingestion_version": ingestion_version
+    }
@@ -0,0 +1,112 @@
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+import numpy as np
+import copy
+import hashlib
+import threading
+import time
+from config.vector_db_config import vector_db_config
+
+class SearchCache:
+    """
+    Caches for the vector search path.
+    An LRU of query embeddings keyed on normalized query text, and a short-TTL cache of
+    search results keyed on (embedding hash, limit, filters). Search results are dropped
+    whenever the collection changes; embeddings only when the collection is rebuilt.
+    """
+    def __init__(
+        self,
+        max_embeddings: int = vector_db_config.query_embedding_cache_size,
+        max_results: int = vector_db_config.search_cache_size,
+        ttl_seconds: float = vector_db_config.search_cache_ttl_seconds
+    ):
+        self.max_embeddings = max_embeddings
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        # Ingestion writes from a worker thread while searches read on the event loop
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so searches that straddle a write are not cached
+        self.generation = 0
+        self.stats = {
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+            "result_hits": 0,
+            "result_misses": 0,
+            "invalidations": 0
+        }
+
+    def normalize(self, text: str) -> str:
+        """Case- and whitespace-insensitive form of a query (the embedding model is uncased)"""
+        return " ".join(text.lower().split())
+
+    def get_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Cached embedding of a query"""
+        key = self.normalize(text)
+        with self._lock:
+            vector = self._embeddings.get(key)
+            if vector is None:
+                self.stats["embedding_misses"] += 1
+                return None
+            self._embeddings.move_to_end(key)
+            self.stats["embedding_hits"] += 1
+            return vector
+
+    def set_embedding(self, text: str, vector: np.ndarray):
+        """Remember the embedding of a query"""
+        with self._lock:
+            self._embeddings[self.normalize(text)] = vector
+            self._embeddings.move_to_end(self.normalize(text))
+            while len(self._embeddings) > self.max_embeddings:
+                self._embeddings.popitem(last=False)
+
+    def results_key(self, vector: np.ndarray, limit: int, filters: Optional[Dict[str, Any]] = None) -> str:
+        """Key of a search: the query vector's bytes, the limit and any filters"""
+        digest = hashlib.sha256(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+        digest.update(f"|{limit}|{sorted((filters or {}).items())}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_results(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached results of a search, if still fresh"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._results[key]
+                self.stats["result_misses"] += 1
+                return None
+            self._results.move_to_end(key)
+            self.stats["result_hits"] += 1
+            return copy.deepcopy(entry[1])
+
+    def set_results(self, key: str, results: List[Dict[str, Any]], generation: int):
+        """Remember the results of a search for ttl_seconds, unless the collection changed meanwhile"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._results[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(results))
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def invalidate(self, embeddings: bool = False):
+        """Drop cached results (and embeddings) after the collection changed"""
+        with self._lock:
+            self._results.clear()
+            if embeddings:
+                self._embeddings.clear()
+            self.generation += 1
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache sizes and hit rates"""
+        embedding_lookups = self.stats["embedding_hits"] + self.stats["embedding_misses"]
+        result_lookups = self.stats["result_hits"] + self.stats["result_misses"]
+        return {
+            **self.stats,
+            "embeddings_cached": len(self._embeddings),
+            "results_cached": len(self._results),
+            "embedding_hit_rate": round(self.stats["embedding_hits"] / embedding_lookups, 3) if embedding_lookups else 0.0,
+            "result_hit_rate": round(self.stats["result_hits"] / result_lookups, 3) if result_lookups else 0.0
+        }
@@ -0,0 +1,141 @@
+from typing import Dict, Any, Optional, List
+import copy
+import time
+import numpy as np
+from agents.config import agent_config
+from models.schemas import ArchitectureRequest
+from services.vector_db_service import vector_db_service
+
+class SemanticDesignCache:
+    """
+    Caches generated architecture designs by the meaning of the request prompt.
+    A new request reuses a past design when its prompt embedding is close enough, its
+    sizing parameters (users, concurrent users, budget, latency) are compatible and its
+    region, usage pattern and constraints are the same.
+    """
+    def __init__(
+        self,
+        similarity_threshold: float = agent_config.semantic_cache_threshold,
+        numeric_tolerance: float = agent_config.semantic_cache_numeric_tolerance,
+        max_entries: int = agent_config.semantic_cache_max_entries,
+        ttl_seconds: int = agent_config.semantic_cache_ttl_seconds,
+        enabled: bool = agent_config.semantic_cache_enabled
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.numeric_tolerance = numeric_tolerance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: List[Dict[str, Any]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "saved_llm_seconds": 0.0
+        }
+
+    async def _embed(self, text: str) -> np.ndarray:
+        """Embed a prompt with the vector DB's embedding worker (off the event loop)"""
+        await vector_db_service.initialize()
+        return (await vector_db_service.embedder.embed([text]))[0]
+
+    def _within_tolerance(self, cached: Optional[float], requested: Optional[float]) -> bool:
+        """Relative comparison for sizing numbers; a missing value only matches another missing value"""
+        if cached is None or requested is None:
+            return cached is None and requested is None
+        if cached == requested:
+            return True
+        return abs(cached - requested) <= self.numeric_tolerance * max(abs(cached), abs(requested))
+
+    def _same_text(self, cached: Optional[str], requested: Optional[str]) -> bool:
+        """Exact match for categorical fields, ignoring case and whitespace"""
+        return " ".join((cached or "").lower().split()) == " ".join((requested or "").lower().split())
+
+    def _is_compatible(self, entry: Dict[str, Any], request: ArchitectureRequest) -> bool:
+        """Check that a cached design was made for the same kind of workload and requirements"""
+        return (
+            self._same_text(entry["region"], request.region)
+            and self._same_text(entry["usage_pattern"], request.usage_pattern)
+            and self._same_text(entry["constraints"], request.constraints)
+            and self._within_tolerance(entry["expected_total_users"], request.expected_total_users)
+            and self._within_tolerance(entry["concurrent_users"], request.concurrent_users)
+            and self._within_tolerance(entry["max_cost"], request.max_cost)
+            and self._within_tolerance(entry["latency_requirements"], request.latency_requirements)
+        )
+
+    def _evict_expired(self):
+        """Drop entries past their TTL"""
+        now = time.time()
+        keep = [i for i, entry in enumerate(self._entries) if entry["expires_at"] > now]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else None
+
+    async def lookup(self, request: ArchitectureRequest) -> Optional[Dict[str, Any]]:
+        """Return a cached architecture for an equivalent request, if there is one"""
+        if not self.enabled:
+            return None
+
+        self._evict_expired()
+        if self._vectors is None:
+            self.stats["misses"] += 1
+            return None
+
+        query = await self._embed(request.prompt)
+        scores = self._vectors @ query
+        for index in np.argsort(-scores):
+            if scores[index] < self.similarity_threshold:
+                break
+            entry = self._entries[index]
+            if self._is_compatible(entry, request):
+                self.stats["hits"] += 1
+                self.stats["saved_llm_seconds"] += entry["llm_seconds"]
+                print(f"♻️  Semantic cache hit (similarity {scores[index]:.3f})")
+                return copy.deepcopy(entry["architecture"])
+
+        self.stats["misses"] += 1
+        return None
+
+    async def store(self, request: ArchitectureRequest, architecture: Dict[str, Any], llm_seconds: float):
+        """Remember a freshly generated design for future paraphrased requests"""
+        if not self.enabled or not architecture:
+            return
+
+        vector = await self._embed(request.prompt)
+        self._entries.append({
+            "prompt": request.prompt,
+            "region": request.region,
+            "expected_total_users": request.expected_total_users,
+            "concurrent_users": request.concurrent_users,
+            "max_cost": request.max_cost,
+            "latency_requirements": request.latency_requirements,
+            "usage_pattern": request.usage_pattern,
+            "constraints": request.constraints,
+            "architecture": copy.deepcopy(architecture),
+            "llm_seconds": llm_seconds,
+            "expires_at": time.time() + self.ttl_seconds
+        })
+        self._vectors = vector[None, :] if self._vectors is None else np.vstack([self._vectors, vector])
+
+        # Oldest entries go first once the cache is full
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            self._entries = self._entries[overflow:]
+            self._vectors = self._vectors[overflow:]
+        self.stats["stores"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and saved LLM time for the metrics endpoint"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "saved_llm_seconds": round(self.stats["saved_llm_seconds"], 2),
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+# Global semantic cache instance
+semantic_design_cache = SemanticDesignCache()
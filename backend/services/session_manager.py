@@ -10,6 +10,7 @@ class RedisSessionManager:
     def __init__(self):
         self.session_timeout = redis_config.session_timeout
         self.session_prefix = "session:"
+        self.queue_prefix = "session_queue:"
         self.redis = redis_manager
     
     def _get_session_key(self, session_id: str) -> str:
@@ -79,6 +80,25 @@ class RedisSessionManager:
         
         return success
     
+    async def set_queue_status(self, session_id: str, status: Optional[Dict[str, Any]]) -> bool:
+        """
+        Store (or with None, clear) a session's LLM queue position. It lives under its
+        own key so these writes never race the read-modify-write of update_session.
+        """
+        if not session_id:
+            return False
+        
+        key = f"{self.queue_prefix}{session_id}"
+        if status is None:
+            return await self.redis.delete(key)
+        return await self.redis.set_json(key, status, expire=self.session_timeout)
+    
+    async def get_queue_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """LLM queue position of a session, if it is waiting"""
+        if not session_id:
+            return None
+        return await self.redis.get_json(f"{self.queue_prefix}{session_id}")
+    
     async def delete_session(self, session_id: str) -> bool:
         """Delete session from Redis"""
         if not session_id:
@@ -0,0 +1,90 @@
+from typing import Dict, Any, Optional, List, Callable, AsyncIterator
+import asyncio
+
+class _Flight:
+    """One in-flight generation shared by every caller that asked for it"""
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake every subscriber waiting for new chunks"""
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent token streams.
+    The first caller for a key starts the underlying stream; later callers with the same key
+    attach to it, replay the chunks produced so far and then follow along. The stream is
+    cancelled only when every caller has gone away.
+    """
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {
+            "started": 0,
+            "coalesced": 0
+        }
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Yield the chunks of the stream for key, starting it with factory if nobody else has"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+            self.stats["started"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                changed = flight.changed
+                while index < len(flight.chunks):
+                    yield flight.chunks[index]
+                    index += 1
+                if flight.done:
+                    if flight.error:
+                        raise flight.error
+                    return
+                if index == len(flight.chunks):
+                    await changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; stop the generation
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _run(self, key: str, flight: _Flight, factory: Callable[[], AsyncIterator[str]]):
+        """Drive the underlying stream and publish its chunks"""
+        try:
+            async for chunk in factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+
+    def _forget(self, key: str, flight: _Flight):
+        """Stop routing new callers to a finished flight"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coalescing counters for the metrics endpoint"""
+        return {
+            **self.stats,
+            "in_flight": len(self._flights)
+        }
@@ -0,0 +1,131 @@
+from typing import Dict, Any, Optional
+
+# JSON schemas for the structured responses the agents expect. They mirror the example
+# shapes in the agents' system prompts and are sent to Ollama as the response format.
+ARCHITECTURE_DESIGN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "analysis": {
+            "type": "object",
+            "properties": {
+                "app_type": {"type": "string"},
+                "scale": {"type": "string"},
+                "expected_users": {"type": "integer"},
+                "concurrent_users": {"type": "integer"},
+                "key_requirements": {"type": "array", "items": {"type": "string"}},
+                "region": {"type": "string"}
+            },
+            "required": ["app_type", "scale", "expected_users", "concurrent_users", "key_requirements", "region"]
+        },
+        "services": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "aws_service": {"type": "string"},
+                    "instance_type": {"type": "string"},
+                    "configuration": {"type": "object"},
+                    "purpose": {"type": "string"},
+                    "estimated_monthly_cost_usd": {"type": "number"}
+                },
+                "required": ["name", "aws_service", "purpose", "estimated_monthly_cost_usd"]
+            }
+        },
+        "architecture_type": {"type": "string"},
+        "networking": {
+            "type": "object",
+            "properties": {
+                "vpc_cidr": {"type": "string"},
+                "public_subnets": {"type": "integer"},
+                "private_subnets": {"type": "integer"},
+                "load_balancer": {"type": "string"}
+            }
+        },
+        "cost_estimate": {
+            "type": "object",
+            "properties": {
+                "currency": {"type": "string"},
+                "estimated_total_monthly_cost": {"type": "number"},
+                "cost_breakdown": {"type": "object"}
+            },
+            "required": ["currency", "estimated_total_monthly_cost"]
+        },
+        "rationale": {"type": "string"}
+    },
+    "required": ["analysis", "services", "architecture_type", "networking", "cost_estimate", "rationale"]
+}
+
+OPTIMIZATION_SUGGESTIONS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "OptimizationSuggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string"},
+                    "resourceId": {"type": "string"},
+                    "resourceType": {"type": "string"},
+                    "optimizationSuggestion": {"type": "string"},
+                    "estimatedImprovement": {"type": "string"}
+                },
+                "required": ["type", "resourceId", "resourceType", "optimizationSuggestion", "estimatedImprovement"]
+            }
+        }
+    },
+    "required": ["OptimizationSuggestions"]
+}
+
+class JsonObjectScanner:
+    """
+    Incremental, brace-balanced scanner for the first top-level JSON object in a token stream.
+    Braces inside strings (and escaped quotes) are ignored, so the scanner knows exactly when
+    the object closes and generation can stop there.
+    """
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True once the top-level object has closed"""
+        for char in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+        return self.complete
+
+    @property
+    def text(self) -> str:
+        """The object text scanned so far (the whole object once complete)"""
+        return "".join(self._buffer)
+
+def extract_json_object(text: str) -> Optional[str]:
+    """Return the first complete top-level JSON object in text, if any"""
+    scanner = JsonObjectScanner()
+    scanner.feed(text)
+    return scanner.text if scanner.complete else None
@@ -0,0 +1,92 @@
+from typing import Dict, Any, Optional, List, Tuple
+import json
+import re
+from agents.config import agent_config
+
+class TokenBudget:
+    """
+    Keeps prompts inside the model's context window.
+    Estimates prompt tokens, compacts JSON, trims retrieved material to a budget and
+    picks the smallest num_ctx bucket that fits the prompt plus room for the response.
+    """
+    def __init__(
+        self,
+        chars_per_token: float = agent_config.chars_per_token,
+        num_ctx_buckets: List[int] = agent_config.num_ctx_buckets,
+        num_predict_reserve: int = agent_config.num_predict_reserve
+    ):
+        self.chars_per_token = chars_per_token
+        self.num_ctx_buckets = sorted(num_ctx_buckets)
+        self.num_predict_reserve = num_predict_reserve
+        self.stats = {
+            "oversized_prompts": 0
+        }
+
+    def estimate_tokens(self, text: str) -> int:
+        """Approximate token count of a piece of text"""
+        return int(len(text) / self.chars_per_token) + 1
+
+    def compact_json(self, value: Any) -> str:
+        """Minified JSON for prompts"""
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def dedupe_context(self, context: Optional[Dict[str, Any]], prompt: str) -> Dict[str, Any]:
+        """
+        Drop empty context entries and entries the prompt already spells out, i.e. the
+        prompt has a "key: value" line with the same key and exactly the same value.
+        """
+        if not context:
+            return {}
+        deduped = {}
+        for key, value in context.items():
+            if value in (None, "", {}, []):
+                continue
+            if isinstance(value, (str, int, float)) and self._states(prompt, key, value):
+                continue
+            deduped[key] = value
+        return deduped
+
+    def _states(self, prompt: str, key: str, value: Any) -> bool:
+        """Whether a line of the prompt reads "key: value" (or "key = value")"""
+        line = rf"^\s*{re.escape(str(key))}\s*[:=]\s*{re.escape(str(value))}\s*$"
+        return re.search(line, prompt, re.IGNORECASE | re.MULTILINE) is not None
+
+    def fit_items(
+        self,
+        items: List[Dict[str, Any]],
+        budget_tokens: int,
+        render=None,
+        score_key: str = "score"
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Keep the most relevant items whose rendered size fits the budget.
+        Returns the kept items (in relevance order) and the tokens they use.
+        """
+        render = render or self.compact_json
+        kept, used = [], 0
+        for item in sorted(items, key=lambda i: i.get(score_key, 0), reverse=True):
+            cost = self.estimate_tokens(render(item))
+            if used + cost > budget_tokens:
+                continue
+            kept.append(item)
+            used += cost
+        return kept, used
+
+    def choose_num_ctx(self, prompt_tokens: int) -> int:
+        """Smallest context bucket that holds the prompt and the reserved response tokens"""
+        needed = prompt_tokens + self.num_predict_reserve
+        for bucket in self.num_ctx_buckets:
+            if needed <= bucket:
+                return bucket
+        self.stats["oversized_prompts"] += 1
+        print(f"⚠️  Prompt needs ~{needed} tokens, more than the largest context ({self.num_ctx_buckets[-1]}); it will be truncated")
+        return self.num_ctx_buckets[-1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "num_ctx_buckets": self.num_ctx_buckets
+        }
+
+# Global token budget instance
+token_budget = TokenBudget()
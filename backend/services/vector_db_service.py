@@ -1,9 +1,25 @@
 from qdrant_client import QdrantClient, models
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from config.vector_db_config import vector_db_config
+from services.embedding_worker import EmbeddingWorker
+from services.search_cache import SearchCache
+from services.embedding_backends import load_embedding_backend
+from services.pattern_metadata import extract_pattern_fields
+import numpy as np
+import asyncio
+import threading
+import json
+import time
 import uuid
 import os
 
+MANIFEST_FILE = "ingestion_manifest.json"
+# File in an artifact directory naming the artifact version to serve
+ARTIFACT_POINTER = "CURRENT"
+# Payload fields searches can filter on; each gets a keyword payload index on a Qdrant server
+INDEXED_FIELDS = ["parent_id", "section", "service_families", "regions", "ingestion_version"]
+
 # Model_Path = "C:/coding/Major-Project-/backend/EM_Model/all-MiniLM-L6-v2"
 Model_Path = "./EM_Model/all-MiniLM-L6-v2"
 print(Model_Path)
@@ -11,63 +27,571 @@ class VectorDBService:
     """
     Manages interactions with the Qdrant vector database for storing and retrieving architecture patterns.
     """
-    def __init__(self, collection_name="architecture_patterns"):
-        # Initialize the Qdrant client to run in-memory for simplicity
-        self.client = QdrantClient(":memory:")
+    def __init__(
+        self,
+        collection_name="architecture_patterns",
+        path: str = vector_db_config.vector_db_path,
+        artifact_path: str = vector_db_config.vector_db_artifact_path
+    ):
+        # The embedding model and Qdrant are set up on first use (or by initialize() at
+        # startup), so importing this module stays cheap
+        # collection_name is an alias; it points at the live versioned collection
+        # (<collection_name>_v<timestamp>) while rebuilds fill a shadow one
         self.collection_name = collection_name
-        
-        # Load a pre-trained model for creating embeddings.
-        print(f"INFO:     Loading embedding model from local path: {Model_Path}")
-        self.embedding_model = SentenceTransformer(Model_Path)
-        
-        # Get the size of the vectors produced by the model
-        self.vector_size = self.embedding_model.get_sentence_embedding_dimension()
-        
-        # Create the collection in Qdrant if it doesn't exist
-        self.client.recreate_collection(
-            collection_name=self.collection_name,
-            vectors_config=models.VectorParams(size=self.vector_size, distance=models.Distance.COSINE),
+        self._live: Optional[str] = None
+        self._building: set = set()
+        # With a prebuilt artifact the index lives in memory and nothing is written to disk
+        self.artifact_path = artifact_path
+        self.path = "" if artifact_path else path
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._client: Optional[QdrantClient] = None
+        # Local-mode Qdrant (path or :memory:) keeps no payload indexes and scores every vector
+        self._local_mode = True
+        self._embedding_model = None
+        self._vector_size: Optional[int] = None
+        self._init_lock = threading.Lock()
+        self.startup_seconds: Optional[float] = None
+        # All encoding runs on one worker thread that merges concurrent requests
+        self.embedder = EmbeddingWorker(lambda: self.embedding_model)
+        self.search_cache = SearchCache()
+    
+    @property
+    def client(self) -> QdrantClient:
+        self._ensure_initialized()
+        return self._client
+    
+    @property
+    def embedding_model(self):
+        self._ensure_initialized()
+        return self._embedding_model
+    
+    @property
+    def vector_size(self) -> int:
+        self._ensure_initialized()
+        return self._vector_size
+    
+    @property
+    def live_collection(self) -> Optional[str]:
+        """Versioned collection searches currently read from"""
+        return self._live
+    
+    @property
+    def read_only(self) -> bool:
+        """Whether a prebuilt artifact is served, which rules out ingestion"""
+        return bool(self.artifact_path)
+    
+    def is_ready(self) -> bool:
+        """Whether the embedding model and collection are loaded"""
+        return self._client is not None
+    
+    async def initialize(self):
+        """Load the embedding model and create the collection without blocking the event loop"""
+        if not self.is_ready():
+            await asyncio.to_thread(self._ensure_initialized)
+    
+    def _ensure_initialized(self):
+        """Load the embedding model and create the collection, once"""
+        if self._client is not None:
+            return
+        with self._init_lock:
+            if self._client is not None:
+                return
+            started_at = time.perf_counter()
+            # Load a pre-trained model for creating embeddings.
+            print(f"INFO:     Loading embedding model from local path: {Model_Path} ({vector_db_config.embedding_backend})")
+            embedding_model = load_embedding_backend(
+                vector_db_config.embedding_backend,
+                Model_Path,
+                vector_db_config.embedding_threads
+            )
+            
+            # Get the size of the vectors produced by the model
+            vector_size = embedding_model.get_sentence_embedding_dimension()
+            
+            # Local on-disk Qdrant keeps the index across restarts; without a path it lives in memory
+            if self.path:
+                os.makedirs(self.path, exist_ok=True)
+                client = QdrantClient(path=self.path)
+            else:
+                client = QdrantClient(":memory:")
+            self._embedding_model = embedding_model
+            self._vector_size = vector_size
+            self._client = client
+            self._manifest = self._read_manifest()
+            self._live = self._alias_target()
+            
+            if self.read_only:
+                self._load_artifact()
+            elif self._can_reuse_collection():
+                print(f"♻️  Reusing collection '{self._live}' ({self.count()} points, ingestion version {self._manifest['ingestion_version']})")
+            elif self._can_serve_collection():
+                # Outdated but compatible: keep answering from it until a rebuild replaces it
+                print(f"♻️  Serving outdated collection '{self._live}' until it is rebuilt")
+            else:
+                # Searches need a collection behind the alias until the first ingestion publishes one
+                self._drop_legacy_collection()
+                self.publish(self._create_versioned_collection(), None)
+                print(f"✅ Collection '{self._live}' created.")
+            self.startup_seconds = time.perf_counter() - started_at
+            print(f"✅ Vector DB Service initialized in {self.startup_seconds:.1f}s.")
+    
+    def _alias_target(self) -> Optional[str]:
+        """Versioned collection the alias currently points at"""
+        for alias in self._client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return None
+    
+    def _drop_legacy_collection(self):
+        """Remove a pre-alias collection stored under the alias name"""
+        existing = [c.name for c in self._client.get_collections().collections]
+        if self.collection_name in existing:
+            self._client.delete_collection(self.collection_name)
+    
+    def _create_versioned_collection(self) -> str:
+        """Create an empty collection named after the alias and the current time"""
+        name = f"{self.collection_name}_v{datetime.now(timezone.utc):%Y%m%d%H%M%S%f}"
+        self._client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(size=self._vector_size, distance=models.Distance.COSINE),
+            quantization_config=self._quantization_config()
+        )
+        # Local mode would only log a warning per index, on every rebuild
+        for field in [] if self._local_mode else INDEXED_FIELDS:
+            self._client.create_payload_index(
+                collection_name=name,
+                field_name=field,
+                field_schema=models.PayloadSchemaType.KEYWORD
+            )
+        return name
+    
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(
+                f"Serving the read-only index artifact {self.artifact_path}; build a new one with build_index.py"
+            )
+    
+    def begin_rebuild(self) -> str:
+        """Create the shadow collection a new ingestion is written into"""
+        self._ensure_initialized()
+        self._check_writable()
+        name = self._create_versioned_collection()
+        self._building.add(name)
+        return name
+    
+    def abort_rebuild(self, name: str):
+        """Drop an unfinished shadow collection"""
+        self._building.discard(name)
+        self._client.delete_collection(name)
+    
+    def publish(self, name: str, manifest: Optional[Dict[str, Any]]):
+        """
+        Atomically switch searches to a finished collection, record its ingestion manifest
+        (None for an empty placeholder) and garbage-collect old versions.
+        """
+        operations = []
+        if self._alias_target() is not None:
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=self.collection_name)
+            ))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=name, alias_name=self.collection_name)
+        ))
+        self._client.update_collection_aliases(change_aliases_operations=operations)
+        # Searches read this attribute, so they switch over in one assignment
+        self._live = name
+        self._building.discard(name)
+        self._write_manifest({**manifest, "collection": name} if manifest else None)
+        # A new collection version is a rebuild: drop cached results and query embeddings
+        self.search_cache.invalidate(embeddings=True)
+        self._collect_garbage()
+    
+    def _collect_garbage(self):
+        """Delete old versions, keeping the live one, builds in progress and a few previous ones for rollback"""
+        prefix = f"{self.collection_name}_v"
+        versions = sorted(
+            c.name for c in self._client.get_collections().collections
+            if c.name.startswith(prefix) and c.name != self._live and c.name not in self._building
+        )
+        keep = vector_db_config.keep_previous_versions
+        for name in versions[:len(versions) - keep] if keep else versions:
+            self._client.delete_collection(name)
+            print(f"🗑️  Deleted old collection version '{name}'")
+    
+    def _quantization_config(self) -> Optional[models.ScalarQuantization]:
+        """Scalar int8 quantization of stored vectors, if enabled"""
+        if vector_db_config.qdrant_quantization != "int8":
+            return None
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
         )
-        print(f"✅ Vector DB Service initialized. Collection '{self.collection_name}' created.")
+    
+    def _can_serve_collection(self) -> bool:
+        """Whether the live collection holds vectors of the current embedding model"""
+        manifest = self._manifest
+        if not manifest or self._live is None or manifest.get("collection") != self._live:
+            return False
+        if manifest.get("embedding_model") != os.path.basename(Model_Path.rstrip("/")):
+            return False
+        params = self._client.get_collection(self._live).config.params.vectors
+        return params.size == self._vector_size
+    
+    def _can_reuse_collection(self) -> bool:
+        """Whether the live collection was built by the current ingestion and embedding model"""
+        return (
+            self._can_serve_collection()
+            and self._manifest.get("ingestion_version") == vector_db_config.ingestion_version
+        )
+    
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Ingestion marker of the on-disk store"""
+        if not self.path:
+            return self._manifest
+        try:
+            with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_manifest(self, manifest: Optional[Dict[str, Any]]):
+        """Store (or clear) the ingestion marker"""
+        self._manifest = manifest
+        if not self.path:
+            return
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if manifest is None:
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            return
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    
+    def count(self, collection_name: Optional[str] = None) -> int:
+        """Number of points in the live (or the given) collection"""
+        self._ensure_initialized()
+        return self._client.count(collection_name=collection_name or self._live, exact=True).count
+    
+    def is_ingested(self) -> bool:
+        """Whether the collection holds a complete ingestion of the current version"""
+        self._ensure_initialized()
+        return bool(
+            self._manifest
+            and self._manifest.get("ingestion_version") == vector_db_config.ingestion_version
+            and self.count() > 0
+        )
+    
+    def publish_ingestion(self, name: str, source: str, pages: int):
+        """Publish a finished ingestion, so searches and later restarts use it"""
+        self.publish(name, {
+            "ingestion_version": vector_db_config.ingestion_version,
+            "embedding_model": os.path.basename(Model_Path.rstrip("/")),
+            "embedding_backend": vector_db_config.embedding_backend,
+            "vector_size": self._vector_size,
+            "collection_name": self.collection_name,
+            "source": source,
+            "pages": pages,
+            "points": self.count(name),
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        })
+    
+    def export_snapshot(self, snapshot_dir: str, batch_size: int = 256) -> Dict[str, Any]:
+        """
+        Write the collection to a portable snapshot directory: manifest.json, vectors.npy and
+        payloads.jsonl (one {"id", "payload"} line per vector, in the same order).
+        Local-mode Qdrant has no native snapshots, hence the custom format.
+        """
+        self._ensure_initialized()
+        os.makedirs(snapshot_dir, exist_ok=True)
+        vectors = []
+        with open(os.path.join(snapshot_dir, "payloads.jsonl"), "w") as f:
+            offset = None
+            while True:
+                points, offset = self._client.scroll(
+                    collection_name=self._live,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for point in points:
+                    f.write(json.dumps({"id": str(point.id), "payload": point.payload}) + "\n")
+                    vectors.append(point.vector)
+                if offset is None:
+                    break
+        np.save(
+            os.path.join(snapshot_dir, "vectors.npy"),
+            np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self._vector_size)
+        )
+        manifest = {
+            **(self._manifest or {"ingestion_version": vector_db_config.ingestion_version}),
+            "embedding_model": os.path.basename(Model_Path.rstrip("/")),
+            "vector_size": self._vector_size,
+            "points": len(vectors)
+        }
+        with open(os.path.join(snapshot_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"📦 Exported {len(vectors)} points to snapshot {snapshot_dir}")
+        return manifest
+    
+    def import_snapshot(self, snapshot_dir: str, batch_size: int = 256) -> Dict[str, Any]:
+        """Load a snapshot directory into a new collection and publish it"""
+        self._ensure_initialized()
+        manifest, vectors, records = self._read_snapshot(snapshot_dir)
+        name = self.begin_rebuild()
+        self._fill_collection(name, vectors, records, batch_size)
+        self.publish(name, {**manifest, "points": self.count(name), "imported_from": snapshot_dir})
+        print(f"📦 Imported {len(records)} points from snapshot {snapshot_dir}")
+        return self._manifest
+    
+    def _load_artifact(self, batch_size: int = 256):
+        """Load the prebuilt artifact into an in-memory collection and serve it"""
+        artifact_dir = self.artifact_path
+        pointer = os.path.join(artifact_dir, ARTIFACT_POINTER)
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                artifact_dir = os.path.join(artifact_dir, f.read().strip())
+        manifest, vectors, records = self._read_snapshot(artifact_dir)
+        name = self._create_versioned_collection()
+        self._fill_collection(name, vectors, records, batch_size)
+        self.publish(name, {**manifest, "points": self.count(name), "artifact": artifact_dir})
+        print(f"📦 Serving {len(records)} points from index artifact {artifact_dir} (read-only)")
+    
+    def _read_snapshot(self, snapshot_dir: str) -> Tuple[Dict[str, Any], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Manifest, vectors and payload records of a snapshot directory, checked against the
+        current ingestion version and embedding model. Vectors are memory-mapped, not read.
+        """
+        with open(os.path.join(snapshot_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("ingestion_version") != vector_db_config.ingestion_version:
+            raise ValueError(
+                f"Snapshot is ingestion version {manifest.get('ingestion_version')}, expected {vector_db_config.ingestion_version}"
+            )
+        if manifest.get("vector_size") != self._vector_size:
+            raise ValueError(
+                f"Snapshot vectors have size {manifest.get('vector_size')}, the embedding model produces {self._vector_size}"
+            )
+        vectors = np.load(os.path.join(snapshot_dir, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(snapshot_dir, "payloads.jsonl")) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if len(records) != len(vectors):
+            raise ValueError(f"Snapshot has {len(vectors)} vectors but {len(records)} payloads")
+        return manifest, vectors, records
+    
+    def _fill_collection(self, name: str, vectors: np.ndarray, records: List[Dict[str, Any]], batch_size: int):
+        """Upsert snapshot points into a collection, one slice of the mapped vectors at a time"""
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            self._client.upsert(
+                collection_name=name,
+                points=[
+                    models.PointStruct(
+                        id=record["id"],
+                        vector=vectors[start + i].tolist(),
+                        payload=record["payload"]
+                    )
+                    for i, record in enumerate(batch)
+                ],
+                wait=True
+            )
 
     def add_pattern(self, description: str, metadata: Dict[str, Any]):
         """
         Adds a new architecture pattern to the vector database.
         """
-        vector = self.embedding_model.encode(description).tolist()
+        self.add_patterns([(description, metadata)], wait=True)
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into overlapping passages that fit the embedding model's input window.
+        Token windows are cut with the model's own tokenizer and mapped back to the text.
+        """
+        model = self.embedding_model
+        size = min(vector_db_config.chunk_tokens, model.max_seq_length - 2)
+        step = max(size - vector_db_config.chunk_overlap_tokens, 1)
+        offsets = model.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False
+        )["offset_mapping"]
         
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[
-                models.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=vector,
-                    payload={"description": description, "architecture": metadata}
-                )
-            ],
+        chunks = []
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + size]
+            chunks.append(text[window[0][0]:window[-1][1]])
+            if start + size >= len(offsets):
+                break
+        return chunks
+
+    def parent_id_for(self, source: Optional[str]) -> str:
+        """Id shared by every passage of a page; re-ingesting the same URL keeps it stable"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, source)) if source else str(uuid.uuid4())
+
+    def set_sources(self, parent_id: str, sources: List[str], collection_name: Optional[str] = None):
+        """Replace the list of pages whose content a stored page stands for"""
+        self._ensure_initialized()
+        self._check_writable()
+        target = collection_name or self._live
+        self._client.set_payload(
+            collection_name=target,
+            payload={"sources": sources},
+            points=models.Filter(must=[
+                models.FieldCondition(key="parent_id", match=models.MatchValue(value=parent_id))
+            ]),
             wait=True
         )
+        if target == self._live:
+            self.search_cache.invalidate()
+
+    def add_patterns(
+        self,
+        batch: List[Tuple[str, Dict[str, Any]]],
+        wait: Optional[bool] = None,
+        collection_name: Optional[str] = None
+    ) -> int:
+        """
+        Adds (description, metadata) architecture patterns in bulk.
+        Each description is split into passages; every passage gets its own vector and
+        carries the parent document's id. Passages are encoded together in batches and
+        upserted as one numpy array. Writes go to the live collection unless a shadow
+        collection being rebuilt is given. Returns the number of passages stored.
+        """
+        self._ensure_initialized()
+        self._check_writable()
+        target = collection_name or self._live
+        payloads = []
+        for description, metadata in batch:
+            source = metadata.get("source")
+            parent_id = self.parent_id_for(source)
+            sources = metadata.get("sources") or [source]
+            metadata = {key: value for key, value in metadata.items() if key != "sources"}
+            # Filterable fields describe the whole page, so every passage carries them
+            fields = extract_pattern_fields(source, description, vector_db_config.ingestion_version)
+            for index, passage in enumerate(self.chunk_text(description)):
+                payloads.append({
+                    **fields,
+                    "description": passage,
+                    "architecture": metadata,
+                    "parent_id": parent_id,
+                    "chunk_index": index,
+                    "source": source,
+                    # Pages found to carry the same content are listed here instead of re-embedded
+                    "sources": sources
+                })
+        if not payloads:
+            return 0
+        vectors = self.embedder.embed_sync([payload["description"] for payload in payloads])
+        self._client.upload_collection(
+            collection_name=target,
+            vectors=vectors,
+            payload=payloads,
+            ids=[str(uuid.uuid4()) for _ in payloads],
+            batch_size=vector_db_config.upsert_batch_size,
+            wait=vector_db_config.upsert_wait if wait is None else wait
+        )
+        if target == self._live:
+            self.search_cache.invalidate()
+        return len(payloads)
+
+    def build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+        """
+        Qdrant filter for search_similar_patterns. Supported keys:
+        section, ingestion_version (exact match), service_families (any of a list) and
+        region (pages naming that region, or no region at all).
+        """
+        if not filters:
+            return None
+        conditions = []
+        for key in ("section", "ingestion_version"):
+            if filters.get(key):
+                conditions.append(models.FieldCondition(key=key, match=models.MatchValue(value=filters[key])))
+        if filters.get("service_families"):
+            conditions.append(models.FieldCondition(
+                key="service_families",
+                match=models.MatchAny(any=list(filters["service_families"]))
+            ))
+        if filters.get("region"):
+            # Most pages are region-agnostic; only exclude ones written for other regions
+            conditions.append(models.Filter(should=[
+                models.FieldCondition(key="regions", match=models.MatchValue(value=filters["region"])),
+                models.IsEmptyCondition(is_empty=models.PayloadField(key="regions"))
+            ]))
+        return models.Filter(must=conditions) if conditions else None
 
-    def search_similar_patterns(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
+    async def search_similar_patterns(
+        self,
+        query: str,
+        limit: int = 3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Searches for architecture patterns similar to the given query.
+        Passage hits are grouped by their parent page; each result is one page with only
+        its best matching passages. Filters (see build_filter) restrict which passages can be
+        returned; on a Qdrant server they also shrink the candidate set through the payload
+        indexes, while local mode still scores every vector.
         """
-        query_vector = self.embedding_model.encode(query).tolist()
+        await self.initialize()
+        query_vector = self.search_cache.get_embedding(query)
+        if query_vector is None:
+            query_vector = (await self.embedder.embed([query]))[0]
+            self.search_cache.set_embedding(query, query_vector)
         
-        search_result = self.client.search(
-            collection_name=self.collection_name,
+        cache_key = self.search_cache.results_key(query_vector, limit, filters)
+        results = self.search_cache.get_results(cache_key)
+        if results is None:
+            generation = self.search_cache.generation
+            # Local-mode Qdrant scores in numpy on the calling thread
+            results = await asyncio.to_thread(
+                self._search_groups, query_vector, limit, self.build_filter(filters)
+            )
+            self.search_cache.set_results(cache_key, results, generation)
+        return results
+    
+    def _search_groups(
+        self,
+        query_vector: np.ndarray,
+        limit: int,
+        query_filter: Optional[models.Filter] = None
+    ) -> List[Dict[str, Any]]:
+        """Passage search grouped by parent page"""
+        search_result = self.client.search_groups(
+            collection_name=self._live,
             query_vector=query_vector,
-            limit=limit
+            query_filter=query_filter,
+            group_by="parent_id",
+            limit=limit,
+            group_size=vector_db_config.passages_per_document,
+            # With quantized vectors, re-score the candidates with the originals
+            search_params=models.SearchParams(
+                quantization=models.QuantizationSearchParams(rescore=True)
+            ) if vector_db_config.qdrant_quantization else None
         )
         
-        return [
-            {
-                "score": hit.score,
-                "description": hit.payload.get("description"),
-                "architecture": hit.payload.get("architecture")
-            }
-            for hit in search_result
-        ]
+        results = []
+        for group in search_result.groups:
+            best = group.hits[0]
+            # Keep the page's passages in reading order
+            hits = sorted(group.hits, key=lambda hit: hit.payload.get("chunk_index", 0))
+            passages = [hit.payload.get("description") for hit in hits]
+            results.append({
+                "score": best.score,
+                "parent_id": group.id,
+                "source": best.payload.get("source"),
+                "sources": best.payload.get("sources", [best.payload.get("source")]),
+                "section": best.payload.get("section"),
+                "service_families": best.payload.get("service_families", []),
+                "passages": passages,
+                "description": "\n".join(passages),
+                "architecture": best.payload.get("architecture")
+            })
+        return results
 
 # Global instance of the service
 vector_db_service = VectorDBService()
\ No newline at end of file
@@ -1,13 +1,135 @@
 import httpx
-from bs4 import BeautifulSoup
+import asyncio
+import multiprocessing
+import lxml.html
+from lxml import etree
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, List
 from urllib.parse import urljoin, urlparse, urlunparse
+from config.vector_db_config import vector_db_config
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Request errors worth retrying; others (bad scheme, too many redirects, ...) fail the same way again
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+CONTENT_TAGS = ("h1", "h2", "h3", "p", "li")
+SKIPPED_EXTENSIONS = (".pdf", ".zip", ".jpg", ".png")
+
+@lru_cache(maxsize=None)
+def _html_parser(encoding: str) -> Optional[lxml.html.HTMLParser]:
+    """Parser that decodes with encoding, overriding any <meta charset>; None if lxml doesn't know it"""
+    try:
+        return lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:
+        return None
+
+def extract_page(
+    html: bytes | str,
+    base_url: str,
+    ignore_paths: Tuple[str, ...],
+    encoding: Optional[str] = None
+) -> Tuple[str, List[str]]:
+    """
+    Text of the page's <main> and the same-host links in its <body>.
+    Module-level so it can run in a worker process; uses lxml directly rather than
+    building a BeautifulSoup tree. Pass the raw response bytes and the charset from the
+    HTTP Content-Type header, if any; without one lxml uses the page's <meta charset>.
+    """
+    if isinstance(html, str):
+        # Already decoded text
+        html, encoding = html.encode("utf-8"), "utf-8"
+    parser = _html_parser(encoding.lower()) if encoding else None
+    try:
+        document = lxml.html.document_fromstring(html, parser=parser)
+    except etree.ParserError:
+        # Empty or whitespace-only document
+        return "", []
+
+    # Find the main content area of the page
+    main_content = document.find(".//main")
+    if main_content is None:
+        return "", []
+
+    # Extract text from relevant tags, like BeautifulSoup's get_text(separator=' ', strip=True)
+    etree.strip_elements(main_content, etree.Comment, "script", "style", with_tail=False)
+    text_parts = []
+    for element in main_content.iter(*CONTENT_TAGS):
+        text_parts.append(" ".join(text.strip() for text in element.itertext() if text.strip()))
+    content_text = "\n".join(text_parts)
+
+    # Search the entire body for links to maximize discovery
+    body_content = document.find("body")
+    if body_content is None:
+        return content_text, []
+
+    # Find all valid, relevant links to crawl next
+    base_hostname = urlparse(base_url).hostname
+    links = set()
+    for a_tag in body_content.iter("a"):
+        href = a_tag.get("href")
+        if href is None or href.startswith(('mailto:', 'javascript:')):
+            continue
+
+        parsed_url = urlparse(urljoin(base_url, href))
+        # Strip query parameters and fragments
+        normalized_url = urlunparse((parsed_url.scheme, parsed_url.netloc, parsed_url.path, '', '', ''))
+
+        if (parsed_url.hostname == base_hostname and
+            not parsed_url.path.endswith(SKIPPED_EXTENSIONS) and
+            not parsed_url.path.startswith(ignore_paths)):
+            links.add(normalized_url)
+
+    return content_text, list(links)
+
+class HostLimiter:
+    """Caps the requests in flight and the request rate for each host"""
+    def __init__(self, concurrency: int, requests_per_second: float):
+        self.concurrency = concurrency
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0.0
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """Wait for a free request slot on host"""
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            if self.interval:
+                # Reserve the next start time before sleeping, so waiters space out evenly
+                now = asyncio.get_running_loop().time()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.interval
+                await asyncio.sleep(start - now)
+            yield
 
 class WebScraperService:
     """
     A service to fetch and parse content from web pages.
+    Requests are limited per host and transient failures retried with backoff, so many
+    crawl workers can share one instance politely.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        host_concurrency: int = vector_db_config.crawl_host_concurrency,
+        host_requests_per_second: float = vector_db_config.crawl_host_requests_per_second,
+        max_retries: int = vector_db_config.crawl_max_retries,
+        retry_backoff_seconds: float = vector_db_config.crawl_retry_backoff_seconds,
+        parse_processes: int = vector_db_config.parse_processes
+    ):
         self.client = httpx.AsyncClient(timeout=20.0, follow_redirects=True)
+        self.limiter = HostLimiter(host_concurrency, host_requests_per_second)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_seconds
+        self.parse_processes = parse_processes
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0
+        }
         self.ignore_paths = [
             "/contact-us", "/legal", "/privacy", "/careers", "/press",
             "/sitemap", "/events", "/partners", "/pricing", "/training",
@@ -17,65 +139,92 @@ class WebScraperService:
             # , "/accessibility", "/translate", "/podcasts" "/transcribe", "/management"
         ]
 
-    async def fetch_page(self, url: str) -> str | None:
-        """Fetches the HTML content of a given URL."""
+    async def fetch_page(self, url: str) -> Tuple[bytes, Optional[str]] | None:
+        """
+        Fetches the raw HTML of a given URL, with the charset from its Content-Type header
+        (None if the header gives none); pass both to parse_page to decode it.
+        """
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.text
-        except httpx.HTTPStatusError as e:
-            print(f"⚠️  Skipping URL due to HTTP error: {e.response.status_code} for url {e.request.url}")
+            host = urlparse(url).hostname or ""
+        except ValueError as e:
+            self.stats["failures"] += 1
+            print(f"⚠️  Skipping invalid URL {url}: {e}")
             return None
-        except httpx.RequestError as e:
-            print(f"❌ Error fetching {url}: {e}")
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter.slot(host):
+                    self.stats["requests"] += 1
+                    response = await self.client.get(url)
+            except httpx.InvalidURL as e:
+                self.stats["failures"] += 1
+                print(f"⚠️  Skipping invalid URL {url}: {e}")
+                return None
+            except httpx.RequestError as e:
+                if isinstance(e, RETRY_ERRORS) and attempt < self.max_retries:
+                    await self._backoff(url, attempt, type(e).__name__)
+                    continue
+                self.stats["failures"] += 1
+                print(f"❌ Error fetching {url}: {e}")
+                return None
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                await self._backoff(url, attempt, f"HTTP {response.status_code}", self._retry_after(response))
+                continue
+            try:
+                response.raise_for_status()
+                return response.content, response.charset_encoding
+            except httpx.HTTPStatusError as e:
+                self.stats["failures"] += 1
+                print(f"⚠️  Skipping URL due to HTTP error: {e.response.status_code} for url {e.request.url}")
+                return None
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Delay the server asked for, if it gave one in seconds"""
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
             return None
-        
-    def _normalize_url(self, url: str) -> str:
-        """Strips query parameters and fragments from a URL."""
-        parsed = urlparse(url)
-        return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
 
-    def parse_content(self, html: str, base_url: str) -> tuple[str, list[str]]:
+    async def _backoff(self, url: str, attempt: int, reason: str, retry_after: Optional[float] = None):
+        """Wait before retrying a request: exponential backoff, or the server's Retry-After"""
+        self.stats["retries"] += 1
+        delay = retry_after if retry_after is not None else self.retry_backoff * 2 ** attempt
+        print(f"🔁 Retrying {url} in {delay:.1f}s ({reason}, attempt {attempt + 1}/{self.max_retries})")
+        await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+        
+    def parse_content(self, html: bytes | str, base_url: str, encoding: Optional[str] = None) -> tuple[str, list[str]]:
         """
         Parses HTML to extract meaningful text content and relevant links.
         This parser is specifically tailored for the aws.amazon.com/architecture layout.
         """
-        soup = BeautifulSoup(html, 'lxml')
-        
-        # Find the main content area of the page
-        main_content = soup.find('main')
-        if not main_content:
-            return "", []
-
-        # Extract text from relevant tags
-        text_parts = []
-        for element in main_content.find_all(['h1', 'h2', 'h3', 'p', 'li']):
-            text_parts.append(element.get_text(separator=' ', strip=True))
-        content_text = "\n".join(text_parts)
-
-        # Search the entire body for links to maximize discovery
-        body_content = soup.find('body')
-        if not body_content:
-            return content_text, []
-
-        # Find all valid, relevant links to crawl next
-        links = set()
-        for a_tag in body_content.find_all('a', href=True):
-            href = a_tag['href']
-
-            if href.startswith(('mailto:', 'javascript:')):
-                continue
+        return extract_page(html, base_url, tuple(self.ignore_paths), encoding)
 
-            full_url = urljoin(base_url, href)
-            normalized_url = self._normalize_url(full_url)
-            parsed_url = urlparse(normalized_url)
+    async def parse_page(self, html: bytes | str, base_url: str, encoding: Optional[str] = None) -> tuple[str, list[str]]:
+        """parse_content in the parser process pool, keeping the event loop free"""
+        if not self.parse_processes:
+            return self.parse_content(html, base_url, encoding)
+        if self._parse_pool is None:
+            # Spawned, not forked: the API process holds the embedding model and worker threads
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._parse_pool, extract_page, html, base_url, tuple(self.ignore_paths), encoding
+            )
+        except BrokenProcessPool:
+            # A parser process died; start a fresh pool for the next pages
+            self.close()
+            raise
 
-            if (parsed_url.hostname == urlparse(base_url).hostname and
-                not any(parsed_url.path.endswith(ext) for ext in ['.pdf', '.zip', '.jpg', '.png']) and
-                not any(parsed_url.path.startswith(ignore) for ignore in self.ignore_paths)):
-                links.add(normalized_url)
-        
-        return content_text, list(links)
+    def close(self):
+        """Stop the parser processes"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(cancel_futures=True)
+            self._parse_pool = None
 
 # Global instance
 web_scraper_service = WebScraperService()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for exercising OllamaService locally without models.
+
+Start a few hosts and point the backend at them:
+    python stub_ollama.py --ports 11435 11436 11437
+    OLLAMA_BASE_URLS='["http://localhost:11435","http://localhost:11436","http://localhost:11437"]'
+
+Implements GET /api/tags, POST /api/show and POST /api/chat (streaming and non-streaming).
+Kill a stub process to see its host ejected, restart it to see it re-admitted.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESPONSE = {
+    "analysis": {
+        "app_type": "web app",
+        "scale": "small",
+        "expected_users": 1000,
+        "concurrent_users": 100,
+        "key_requirements": ["web hosting", "database"],
+        "region": "ap-south-1"
+    },
+    "services": [
+        {
+            "name": "web-tier",
+            "aws_service": "EC2",
+            "instance_type": "t3.small",
+            "configuration": {"vcpus": 2, "memory_gb": 2},
+            "purpose": "handles requests",
+            "estimated_monthly_cost_usd": 17
+        }
+    ],
+    "architecture_type": "3-tier",
+    "networking": {"vpc_cidr": "10.0.0.0/16", "public_subnets": 2, "private_subnets": 2, "load_balancer": "ALB"},
+    "cost_estimate": {"currency": "INR", "estimated_total_monthly_cost": 1411, "cost_breakdown": {"compute": 1411}},
+    "rationale": "Stub response"
+}
+
+def make_handler(models, token_delay):
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, format, *args):
+            print(f"[stub :{self.server.server_port}] {format % args}")
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": model} for model in models]})
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            request = self._read_json()
+            if self.path == "/api/show":
+                self._send_json({"modelfile": f"FROM {request.get('model')}", "parameters": ""})
+                return
+            if self.path != "/api/chat":
+                self._send_json({"error": "not found"}, 404)
+                return
+            if request.get("model") not in models:
+                self._send_json({"error": f"model '{request.get('model')}' not found"}, 404)
+                return
+
+            text = json.dumps(CANNED_RESPONSE) + "\n\nHope this helps!"
+            prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+            final = {
+                "model": request["model"],
+                "done": True,
+                "prompt_eval_count": prompt_chars // 4,
+                "prompt_eval_duration": prompt_chars * 1000,
+                "eval_count": len(text),
+                "load_duration": 0
+            }
+            if not request.get("stream", True):
+                time.sleep(token_delay * len(text))
+                self._send_json({**final, "message": {"role": "assistant", "content": text}})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                for char in text:
+                    time.sleep(token_delay)
+                    chunk = {"model": request["model"], "done": False, "message": {"role": "assistant", "content": char}}
+                    self.wfile.write((json.dumps(chunk) + "\n").encode())
+                    self.wfile.flush()
+                self.wfile.write((json.dumps({**final, "message": {"role": "assistant", "content": ""}}) + "\n").encode())
+            except (BrokenPipeError, ConnectionResetError):
+                print(f"[stub :{self.server.server_port}] client closed the stream early")
+
+    return StubOllamaHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run stub Ollama servers")
+    parser.add_argument("--ports", type=int, nargs="+", default=[11435])
+    parser.add_argument("--models", nargs="+", default=["llama3.2:3b"])
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds per streamed token")
+    args = parser.parse_args()
+
+    servers = []
+    for port in args.ports:
+        server = ThreadingHTTPServer(("0.0.0.0", port), make_handler(args.models, args.token_delay))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"🧪 Stub Ollama listening on http://localhost:{port} with models {args.models}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
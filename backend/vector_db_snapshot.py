@@ -0,0 +1,28 @@
+"""
+Export or import the reference-architecture index as a portable snapshot.
+
+    python vector_db_snapshot.py export ./snapshots/architecture_patterns
+    python vector_db_snapshot.py import ./snapshots/architecture_patterns
+
+A snapshot is a directory with manifest.json, vectors.npy and payloads.jsonl. Ship one in
+the container image and point VECTOR_DB_SNAPSHOT_PATH at it to skip the crawl on first boot.
+Run this while the API is stopped: local-mode Qdrant allows one process per store.
+"""
+import argparse
+import json
+from services.vector_db_service import vector_db_service
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the vector DB snapshot")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("snapshot_dir")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        manifest = vector_db_service.export_snapshot(args.snapshot_dir)
+    else:
+        manifest = vector_db_service.import_snapshot(args.snapshot_dir)
+    print(json.dumps(manifest, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ function Generate() {
   const [architecture, setArchitecture] = useState(null);
   const [error, setError] = useState("");
   const [mermaidCode, setMermaidCode] = useState("");
+  const [progressStep, setProgressStep] = useState("");
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -34,6 +35,7 @@ function Generate() {
     setMermaidCode("");
     setResponse("");
     setSessionId(null);
+    setProgressStep("");
 
     const payload = {
       prompt: description,
@@ -49,20 +51,68 @@ function Generate() {
     };
 
     try {
-      const res = await fetch(`${API_BASE}/api/architecture/generate`, {
+      // Stream progress and tokens as NDJSON so output shows up as soon as the model starts
+      const res = await fetch(`${API_BASE}/api/architecture/generate/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),
       });
-      const data = await res.json();
+      if (!res.ok || !res.body) {
+        throw new Error(`Stream request failed with status ${res.status}`);
+      }
 
-      if (data.session_id) {
-        setSessionId(data.session_id);
-        pollForResult(data.session_id, 0);
-      } else {
-        setError("Failed to start agent session.");
-        setPolling(false);
-        setIsLoading(false);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let streamSessionId = null;
+      let finished = false;
+
+      const handleEvent = (event) => {
+        if (event.event === "session") {
+          streamSessionId = event.session_id;
+          setSessionId(event.session_id);
+        } else if (event.event === "progress") {
+          setProgressStep(event.step);
+        } else if (event.event === "token") {
+          setResponse((prev) => prev + event.content);
+        } else if (event.event === "complete") {
+          finished = true;
+          setPolling(false);
+          setIsLoading(false);
+          setProgressStep("");
+          setArchitecture(event.architecture);
+          setResponse(JSON.stringify(event.architecture, null, 2));
+          setMermaidCode(jsonToMermaid(event.architecture));
+        } else if (event.event === "error") {
+          finished = true;
+          setError(event.error || "Architecture generation failed.");
+          setPolling(false);
+          setIsLoading(false);
+          setProgressStep("");
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (line.trim()) handleEvent(JSON.parse(line));
+        }
+      }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
+
+      // Connection dropped before the result arrived; fall back to polling the session
+      if (!finished) {
+        if (streamSessionId) {
+          pollForResult(streamSessionId, 0);
+        } else {
+          setError("Failed to start agent session.");
+          setPolling(false);
+          setIsLoading(false);
+        }
       }
     } catch (err) {
       setError("Network error. Please try again.");
@@ -358,7 +408,8 @@ function Generate() {
 
         {polling && (
           <div className="mt-8 text-blue-600 font-semibold">
-            Generating architecture... (this may take a few minutes)
+            Generating architecture...{" "}
+            {progressStep ? `(${progressStep.replaceAll("_", " ")})` : "(this may take a few minutes)"}
           </div>
         )}
         {error && (